@@ -8,29 +8,37 @@ from discord.ext import commands, tasks
 
 from datetime import datetime, date, time, timezone, timedelta
 from zoneinfo import ZoneInfo
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from operator import attrgetter
+from bisect import bisect_left
+from collections import OrderedDict
+from collections.abc import Iterable
 
 import asyncio
+import heapq
 import sqlite3
+import aiosqlite
 import os
 import re
+import unicodedata
 from pathlib import Path
 
-# Load environment variables from .env file (if exists)
+# Load environment variables from .env file (if exists).
+# Real environment variables (e.g. from the systemd unit) take precedence.
+_ENV_RE = re.compile(r"^[ \t]*([A-Za-z_][A-Za-z0-9_]*)[ \t]*=[ \t]*(.*?)\s*$", re.MULTILINE)
+
 env_path = Path(__file__).parent / ".env"
 if env_path.exists():
-    with open(env_path) as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith("#") and "=" in line:
-                key, value = line.split("=", 1)
-                os.environ[key.strip()] = value.strip()
+    for key, value in _ENV_RE.findall(env_path.read_text()):
+        os.environ.setdefault(key, value)
 import traceback
 import logging
 import signal
-import sys
-from difflib import get_close_matches
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from threading import Thread
+from rapidfuzz import fuzz, process, utils as fuzz_utils
+import math
+from time import monotonic, perf_counter
+from aiohttp import web
 
 # Basic logging setup writes to console and bot.log for troubleshooting.
 # force=True ensures we override any prior logging config from discord.py.
@@ -45,6 +53,12 @@ logging.basicConfig(
 )
 logging.info("CMI Bot logging initialized")
 
+# Stdlib UTC singleton (no tzdata lookup)
+UTC = timezone.utc
+
+# User mention syntax: <@123> or <@!123>
+_MENTION_RE = re.compile(r"<@!?(\d+)>")
+
 
 # ============================================================
 # Bot Token
@@ -71,7 +85,7 @@ if not TOKEN:
 # To find your ID: Enable Developer Mode in Discord → Right-click your name → Copy ID
 # Example: DISCORD_OWNER_IDS="123456789012345678,987654321098765432"
 OWNER_IDS_STR = os.environ.get("DISCORD_OWNER_IDS", "")
-OWNER_IDS = [int(id.strip()) for id in OWNER_IDS_STR.split(",") if id.strip()]
+OWNER_IDS = frozenset(int(id.strip()) for id in OWNER_IDS_STR.split(",") if id.strip())
 
 
 # ============================================================
@@ -81,7 +95,8 @@ intents = discord.Intents.default()
 intents.members = True
 intents.message_content = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+# Member search runs against the member cache, so keep every guild fully chunked
+bot = commands.Bot(command_prefix="!", intents=intents, chunk_guilds_at_startup=True)
 
 
 # ============================================================
@@ -92,133 +107,362 @@ DB_PATH = "cmi.db"
 # Section 2 — Database Setup
 # ============================================================
 
-def get_db_connection():
-    """Return a SQLite connection with row access by column name."""
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
-    conn.row_factory = sqlite3.Row
-    return conn
-
-
-def init_db():
-    """Initialize all required tables if they do not already exist."""
-    conn = get_db_connection()
-    cur = conn.cursor()
+# Per-connection PRAGMAs. journal_mode=WAL is persistent and set once in init_db().
+DB_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA cache_size=-20000",  # ~20 MB page cache
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",  # read pages via mmap (256 MB cap)
+)
 
-    # Store all CMIs
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS cmi_entries (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            guild_id INTEGER NOT NULL,
-            user_id INTEGER NOT NULL,
-            leave_dt TEXT NOT NULL,
-            return_dt TEXT,
-            reason TEXT,
-            timezone_label TEXT,
-            created_at TEXT NOT NULL,
-            created_by_user_id INTEGER
-        );
-        """
-    )
-    
-    # Add created_by_user_id column if it doesn't exist (migration for existing databases)
+# Prepared statements kept per connection (sqlite3 default is 128)
+DB_CACHED_STATEMENTS = 256
+
+# Keeps IN (...) lists under SQLite's default 999 bound-parameter limit
+SQLITE_IN_CHUNK = 900
+
+# Single long-lived connection shared by the whole bot (opened in main()).
+_db_conn: aiosqlite.Connection | None = None
+_db_open_lock = asyncio.Lock()
+# Serialises writes on _db_conn: an autocommit statement issued while the batch
+# writer is between BEGIN and COMMIT would otherwise join (and be rolled back or
+# hidden from the read pool with) that batch's transaction.
+_db_write_lock = asyncio.Lock()
+
+
+async def open_db() -> aiosqlite.Connection:
+    """Open the shared aiosqlite connection (autocommit, row access by column name)."""
+    global _db_conn
+    if _db_conn is not None:
+        return _db_conn
+    # Concurrent first callers must not each open (and leak) a connection
+    async with _db_open_lock:
+        if _db_conn is None:
+            conn = await aiosqlite.connect(
+                DB_PATH,
+                isolation_level=None,
+                cached_statements=DB_CACHED_STATEMENTS,
+            )
+            conn.row_factory = aiosqlite.Row
+            for pragma in DB_PRAGMAS:
+                await conn.execute(pragma)
+            _db_conn = conn
+    return _db_conn
+
+
+# Read-only connections for the db_fetch*/db_iterate helpers. Under WAL they
+# read concurrently instead of queueing behind writes on the shared connection,
+# and never see a batch transaction that is still open.
+DB_READ_POOL_SIZE = 4
+_read_pool: asyncio.Queue | None = None
+_read_pool_conns: list[aiosqlite.Connection] = []
+
+
+async def _open_read_pool() -> asyncio.Queue:
+    global _read_pool
+    async with _db_open_lock:
+        if _read_pool is None:
+            pool: asyncio.Queue = asyncio.Queue()
+            for _ in range(DB_READ_POOL_SIZE):
+                conn = await aiosqlite.connect(
+                    f"file:{DB_PATH}?mode=ro",
+                    uri=True,
+                    isolation_level=None,
+                    cached_statements=DB_CACHED_STATEMENTS,
+                )
+                conn.row_factory = aiosqlite.Row
+                for pragma in DB_PRAGMAS:
+                    await conn.execute(pragma)
+                _read_pool_conns.append(conn)
+                pool.put_nowait(conn)
+            _read_pool = pool
+    return _read_pool
+
+
+@asynccontextmanager
+async def read_connection():
+    """Borrow a read-only connection from the pool for the duration of the block."""
+    pool = _read_pool or await _open_read_pool()
+    conn = await pool.get()
     try:
-        cur.execute("ALTER TABLE cmi_entries ADD COLUMN created_by_user_id INTEGER")
-        logging.info("Added created_by_user_id column to cmi_entries")
-    except sqlite3.OperationalError:
-        pass  # Column already exists
+        yield conn
+    finally:
+        pool.put_nowait(conn)
+
+
+async def close_db():
+    """Flush queued writes, then close the shared connection and read pool, if open."""
+    global _db_conn, _db_writer_task, _read_pool
+    if _db_writer_task is not None:
+        await _write_queue.join()
+        _db_writer_task.cancel()
+        _db_writer_task = None
+    if _read_pool is not None:
+        _read_pool = None
+        while _read_pool_conns:
+            await _read_pool_conns.pop().close()
+    if _db_conn is not None:
+        conn, _db_conn = _db_conn, None
+        await conn.close()
+        logging.info("Database connection closed")
+
+
+async def db_fetchone(query: str, params: tuple = ()):
+    """Run a read query and return the first row (or None)."""
+    async with read_connection() as conn:
+        async with conn.execute(query, params) as cur:
+            return await cur.fetchone()
+
+
+async def db_fetchall(query: str, params: tuple = ()) -> list:
+    """Run a read query and return all rows."""
+    async with read_connection() as conn:
+        return list(await conn.execute_fetchall(query, params))
+
+
+async def db_iterate(query: str, params: tuple = ()):
+    """Run a read query and yield rows as they are fetched, without a full fetchall()."""
+    async with read_connection() as conn:
+        async with conn.execute(query, params) as cur:
+            async for row in cur:
+                yield row
+
+
+async def db_execute(query: str, params: tuple = ()):
+    """Run a write statement (autocommit). Returns the cursor (lastrowid / rowcount)."""
+    conn = await open_db()
+    async with _db_write_lock:
+        async with conn.execute(query, params) as cur:
+            return cur
+
+
+async def db_execute_returning(query: str, params: tuple = ()):
+    """Run a write statement with a RETURNING clause (autocommit) and return the first row, or None."""
+    conn = await open_db()
+    # Step every row so the statement completes (and commits) before returning
+    async with _db_write_lock:
+        rows = await conn.execute_fetchall(query, params)
+    return rows[0] if rows else None
 
-    # Store guild settings (server timezone text)
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS guild_settings (
-            guild_id INTEGER PRIMARY KEY,
-            server_timezone TEXT NOT NULL
-        );
-        """
-    )
 
-    # Store per-user timezone settings (per guild)
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS user_timezones (
-            guild_id INTEGER NOT NULL,
-            user_id INTEGER NOT NULL,
-            timezone TEXT NOT NULL,
-            PRIMARY KEY (guild_id, user_id)
-        );
-        """
-    )
+# ------------------------------------------------------------
+# Batched writes
+# ------------------------------------------------------------
+# Settings writes are queued and committed together in one transaction,
+# so a burst of setter calls shares a single commit.
+WRITE_BATCH_DELAY = 0.05
+WRITE_BATCH_MAX = 32
+
+_write_queue: asyncio.Queue = asyncio.Queue()
+_db_writer_task: asyncio.Task | None = None
+
+
+async def db_write(query: str, params: tuple = ()):
+    """Queue a write statement and wait until its batch is committed."""
+    global _db_writer_task
+    if _db_writer_task is None:
+        _db_writer_task = asyncio.create_task(_db_writer())
+    fut = asyncio.get_running_loop().create_future()
+    await _write_queue.put((query, params, fut))
+    await fut
+
+
+async def _db_writer():
+    """Drain the write queue in batches of up to WRITE_BATCH_MAX statements."""
+    while True:
+        batch = [await _write_queue.get()]
+        # Give other writers in this burst a moment to join the batch
+        await asyncio.sleep(WRITE_BATCH_DELAY)
+        while len(batch) < WRITE_BATCH_MAX and not _write_queue.empty():
+            batch.append(_write_queue.get_nowait())
+
+        conn = await open_db()
+        errors: list[Exception | None] = []
+        async with _db_write_lock:
+            try:
+                await conn.execute("BEGIN IMMEDIATE")
+                for query, params, _ in batch:
+                    # A savepoint per statement so one failure doesn't undo the rest
+                    await conn.execute("SAVEPOINT batch_write")
+                    try:
+                        await conn.execute(query, params)
+                        errors.append(None)
+                    except Exception as e:
+                        await conn.execute("ROLLBACK TO batch_write")
+                        errors.append(e)
+                    await conn.execute("RELEASE batch_write")
+                await conn.execute("COMMIT")
+            except Exception as e:
+                logging.error(f"Batched write failed: {e}")
+                try:
+                    await conn.execute("ROLLBACK")
+                except Exception:
+                    pass
+                errors = [e] * len(batch)
 
-    # Store CMI channel restriction (per guild)
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS guild_channels (
-            guild_id INTEGER PRIMARY KEY,
-            cmi_channel_id INTEGER
-        );
-        """
-    )
+        for (_, _, fut), error in zip(batch, errors):
+            if not fut.done():
+                if error is None:
+                    fut.set_result(None)
+                else:
+                    fut.set_exception(error)
+            _write_queue.task_done()
+
+
+# Tables. Every statement is idempotent so the whole script runs on each start.
+SCHEMA_SQL = """
+PRAGMA journal_mode=WAL;
+
+-- Store all CMIs
+CREATE TABLE IF NOT EXISTS cmi_entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    leave_dt TEXT NOT NULL,
+    return_dt TEXT,
+    reason TEXT,
+    timezone_label TEXT,
+    created_at TEXT NOT NULL,
+    created_by_user_id INTEGER,
+    leave_ts INTEGER,
+    return_ts INTEGER
+);
+
+-- Store guild settings (server timezone text)
+CREATE TABLE IF NOT EXISTS guild_settings (
+    guild_id INTEGER PRIMARY KEY,
+    server_timezone TEXT NOT NULL
+);
+
+-- Store per-user timezone settings (per guild)
+CREATE TABLE IF NOT EXISTS user_timezones (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    timezone TEXT NOT NULL,
+    PRIMARY KEY (guild_id, user_id)
+);
+
+-- Store CMI channel restriction (per guild)
+CREATE TABLE IF NOT EXISTS guild_channels (
+    guild_id INTEGER PRIMARY KEY,
+    cmi_channel_id INTEGER
+);
+
+-- Store away role per guild
+CREATE TABLE IF NOT EXISTS guild_away_roles (
+    guild_id INTEGER PRIMARY KEY,
+    role_id INTEGER
+);
+
+-- Store nickname prefix per guild
+CREATE TABLE IF NOT EXISTS guild_nickname_prefix (
+    guild_id INTEGER PRIMARY KEY,
+    prefix TEXT NOT NULL
+);
+
+-- Store additional leadership roles
+CREATE TABLE IF NOT EXISTS guild_bot_perm_roles (
+    guild_id INTEGER NOT NULL,
+    role_id INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, role_id)
+);
+
+-- Store additional leadership users
+CREATE TABLE IF NOT EXISTS guild_bot_perm_users (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, user_id)
+);
+
+-- Store daily CMI report settings
+CREATE TABLE IF NOT EXISTS guild_daily_report_settings (
+    guild_id INTEGER PRIMARY KEY,
+    enabled INTEGER NOT NULL DEFAULT 0,
+    channel_id INTEGER,
+    report_hour INTEGER NOT NULL DEFAULT 8
+);
+"""
+
+# Indexes and triggers, applied after column migrations so they can use new columns.
+# SQL-side date filters use the INTEGER unix-second columns (leave_ts / return_ts);
+# the ISO TEXT columns keep the original offset for display.
+INDEXES_SQL = """
+-- Superseded indexes
+DROP INDEX IF EXISTS idx_cmi_guild_user_return;
+DROP INDEX IF EXISTS idx_cmi_guild_return;
+DROP INDEX IF EXISTS idx_cmi_guild_user_return_ts;
+
+-- Per-user lookups (overlap checks, "my CMIs") filter on guild + user + return time.
+-- leave_ts is carried so overlap probes (has_overlapping_cmi, the edit UPDATE's
+-- NOT EXISTS and the insert trigger) never touch the table. No (guild_id, id)
+-- index: id is the rowid, so those lookups are already a single B-tree probe.
+CREATE INDEX IF NOT EXISTS idx_cmi_guild_user_return_leave_ts
+ON cmi_entries (guild_id, user_id, return_ts, leave_ts);
+
+-- Guild-wide scans (daily report, list, cleanup) filter on guild + return time.
+-- (guild_id, user_id) lookups are covered by the prefix of the index above.
+CREATE INDEX IF NOT EXISTS idx_cmi_guild_return_ts
+ON cmi_entries (guild_id, return_ts);
+
+-- Reject overlapping CMIs for the same user at insert time. Entries that
+-- have already ended are ignored, matching has_overlapping_cmi().
+DROP TRIGGER IF EXISTS cmi_no_overlap;
+CREATE TRIGGER cmi_no_overlap
+BEFORE INSERT ON cmi_entries
+BEGIN
+    SELECT RAISE(ABORT, 'CMI overlaps an existing entry')
+    WHERE EXISTS (
+        SELECT 1 FROM cmi_entries
+        WHERE guild_id = NEW.guild_id AND user_id = NEW.user_id
+        AND (return_ts IS NULL OR return_ts >= CAST(strftime('%s', 'now') AS INTEGER))
+        AND (return_ts IS NULL OR return_ts >= NEW.leave_ts)
+        AND (NEW.return_ts IS NULL OR leave_ts <= NEW.return_ts)
+    );
+END;
+
+-- Refresh planner statistics so the indexes above get picked
+ANALYZE;
+"""
 
-    # Store away role per guild
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS guild_away_roles (
-            guild_id INTEGER PRIMARY KEY,
-            role_id INTEGER
-        );
-        """
-    )
 
-    # Store nickname prefix per guild
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS guild_nickname_prefix (
-            guild_id INTEGER PRIMARY KEY,
-            prefix TEXT NOT NULL
-        );
-        """
-    )
+def init_db():
+    """Initialize all required tables if they do not already exist."""
+    conn = sqlite3.connect(DB_PATH)
+    cur = conn.cursor()
 
-    # Store additional leadership roles
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS guild_bot_perm_roles (
-            guild_id INTEGER NOT NULL,
-            role_id INTEGER NOT NULL,
-            PRIMARY KEY (guild_id, role_id)
-        );
-        """
-    )
+    cur.executescript(SCHEMA_SQL)
 
-    # Store additional leadership users
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS guild_bot_perm_users (
-            guild_id INTEGER NOT NULL,
-            user_id INTEGER NOT NULL,
-            PRIMARY KEY (guild_id, user_id)
-        );
-        """
-    )
+    # Column migrations for databases created by older versions
+    cols = {r[1] for r in cur.execute("PRAGMA table_info(cmi_entries)")}
+    if "created_by_user_id" not in cols:
+        cur.execute("ALTER TABLE cmi_entries ADD COLUMN created_by_user_id INTEGER")
+        logging.info("Added created_by_user_id column to cmi_entries")
+    if "leave_ts" not in cols:
+        cur.execute("ALTER TABLE cmi_entries ADD COLUMN leave_ts INTEGER")
+        cur.execute("ALTER TABLE cmi_entries ADD COLUMN return_ts INTEGER")
+        cur.execute(
+            """
+            UPDATE cmi_entries
+            SET leave_ts = CAST(strftime('%s', leave_dt) AS INTEGER),
+                return_ts = CAST(strftime('%s', return_dt) AS INTEGER)
+            """
+        )
+        logging.info("Added and backfilled leave_ts/return_ts columns on cmi_entries")
 
-    # Store daily CMI report settings
-    cur.execute(
-        """
-        CREATE TABLE IF NOT EXISTS guild_daily_report_settings (
-            guild_id INTEGER PRIMARY KEY,
-            enabled INTEGER NOT NULL DEFAULT 0,
-            channel_id INTEGER,
-            report_hour INTEGER NOT NULL DEFAULT 8
-        );
-        """
-    )
+    cur.executescript(INDEXES_SQL)
 
     conn.commit()
     conn.close()
+
+
 # ------------------------------------------------------------
 # Interval Overlap Detection
 # ------------------------------------------------------------
+# Open-ended sentinel for UTC intervals (avoids a replace() per call)
+_DT_MAX_UTC = datetime.max.replace(tzinfo=UTC)
+
+
 def intervals_overlap(
     start1: datetime,
     end1: datetime | None,
@@ -227,9 +471,9 @@ def intervals_overlap(
 ) -> bool:
     """Return True if two datetime intervals overlap."""
     if end1 is None:
-        end1 = datetime.max.replace(tzinfo=start1.tzinfo)
+        end1 = _DT_MAX_UTC if start1.tzinfo is UTC else datetime.max.replace(tzinfo=start1.tzinfo)
     if end2 is None:
-        end2 = datetime.max.replace(tzinfo=start2.tzinfo)
+        end2 = _DT_MAX_UTC if start2.tzinfo is UTC else datetime.max.replace(tzinfo=start2.tzinfo)
 
     return start1 <= end2 and start2 <= end1
 
@@ -245,53 +489,45 @@ async def has_overlapping_cmi(
     Check if a new or edited CMI overlaps with existing ones.
     Only considers active or future CMIs (not ones that have already ended).
     Returns (True, conflict_dict) or (False, None).
+
+    The interval test runs in SQL on the integer unix-second columns, so only
+    the first conflicting row is returned and parsed.
     """
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
+    now_ts = int(datetime.now(UTC).timestamp())
+    new_leave_ts = int(new_leave_dt.timestamp())
+    new_return_ts = int(new_return_dt.timestamp()) if new_return_dt else None
+
+    row = await db_fetchone(
         """
-        SELECT id, leave_dt, return_dt, reason
+        SELECT id, leave_ts, return_ts, reason
         FROM cmi_entries
         WHERE guild_id = ? AND user_id = ?
+        AND (? IS NULL OR id <> ?)
+        AND (return_ts IS NULL OR return_ts >= ?)
+        AND (? IS NULL OR leave_ts <= ?)
+        ORDER BY id
+        LIMIT 1
         """,
-        (guild_id, user_id),
+        (
+            guild_id,
+            user_id,
+            exclude_id,
+            exclude_id,
+            # Existing entry must not have ended, nor end before the new one starts
+            max(now_ts, new_leave_ts),
+            new_return_ts,
+            new_return_ts,
+        ),
     )
-    rows = cur.fetchall()
-    conn.close()
-
-    now = datetime.now(ZoneInfo("UTC"))
-
-    for row in rows:
-        if exclude_id is not None and row["id"] == exclude_id:
-            continue
-
-        try:
-            existing_leave = datetime.fromisoformat(row["leave_dt"])
-        except Exception:
-            continue
-
-        try:
-            existing_return = (
-                datetime.fromisoformat(row["return_dt"])
-                if row["return_dt"]
-                else None
-            )
-        except Exception:
-            existing_return = None
-
-        # Skip CMIs that have already ended
-        if existing_return and existing_return < now:
-            continue
+    if not row:
+        return False, None
 
-        if intervals_overlap(new_leave_dt, new_return_dt, existing_leave, existing_return):
-            return True, {
-                "id": row["id"],
-                "leave_dt": existing_leave,
-                "return_dt": existing_return,
-                "reason": row["reason"],
-            }
-
-    return False, None
+    return True, {
+        "id": row["id"],
+        "leave_dt": from_epoch(row["leave_ts"]),
+        "return_dt": from_epoch(row["return_ts"]),
+        "reason": row["reason"],
+    }
 
 
 # ------------------------------------------------------------
@@ -302,13 +538,31 @@ def to_discord_timestamp(dt: datetime | None) -> str | None:
     if dt is None:
         return None
 
+    # Aware datetimes already know their epoch offset; naive ones are treated as UTC
     if dt.tzinfo is None:
-        dt_utc = dt.replace(tzinfo=timezone.utc)
-    else:
-        dt_utc = dt.astimezone(timezone.utc)
+        dt = dt.replace(tzinfo=UTC)
+
+    return f"<t:{int(dt.timestamp())}:f>"
+
 
-    unix_ts = int(dt_utc.timestamp())
-    return f"<t:{unix_ts}:f>"
+def fmt_dmyhm(dt: datetime) -> str:
+    """Format as DD/MM/YYYY HH:MM; same output as strftime("%d/%m/%Y %H:%M")."""
+    return f"{dt.day:02d}/{dt.month:02d}/{dt.year} {dt.hour:02d}:{dt.minute:02d}"
+
+
+def same_minute(new: datetime | None, old: datetime | None) -> bool:
+    """
+    True if new is old as re-entered through a modal, which only shows minutes.
+    None (open-ended) only matches None.
+    """
+    if new is None or old is None:
+        return new is old
+    return new == old or new == old.replace(second=0, microsecond=0)
+
+
+def from_epoch(ts: int | None, tz: ZoneInfo | timezone = UTC) -> datetime | None:
+    """Convert a stored leave_ts/return_ts (UTC epoch seconds) to an aware datetime in tz."""
+    return datetime.fromtimestamp(ts, tz) if ts is not None else None
 
 
 # ============================================================
@@ -349,54 +603,109 @@ TIMEZONE_ALIASES = {
 }
 
 
+@lru_cache(maxsize=256)
+def get_zone(name: str) -> ZoneInfo:
+    """Return a ZoneInfo for an IANA name, memoized per name."""
+    return ZoneInfo(name)
+
+
+@lru_cache(maxsize=256)
+def _zi_ok(name: str) -> bool:
+    """True if name is a loadable IANA zone. Invalid names are cached too."""
+    try:
+        get_zone(name)
+        return True
+    except Exception:
+        return False
+
+
 def normalize_timezone_input(tz_str: str | None) -> str | None:
     """
     Accepts IANA names (e.g. 'Pacific/Auckland') or friendly aliases ('NZT', 'Sydney').
-    Returns a valid IANA name or None if invalid.
+    Returns a valid IANA name or None if invalid. Results are memoized per input.
     """
     if not tz_str:
         return None
+    # Strip before the cache so "NZT" and " NZT " share an entry. No casefold:
+    # IANA names are case-sensitive on disk.
+    return _normalize_timezone_cached(tz_str.strip())
 
-    tz_clean = tz_str.strip()
 
+@lru_cache(maxsize=512)
+def _normalize_timezone_cached(tz_clean: str) -> str | None:
     # If it looks like an IANA name, try it directly
     if "/" in tz_clean:
-        try:
-            ZoneInfo(tz_clean)
-            return tz_clean
-        except Exception:
-            return None
+        return tz_clean if _zi_ok(tz_clean) else None
 
-    # Otherwise try alias mapping
-    alias_key = tz_clean.upper()
-    if alias_key in TIMEZONE_ALIASES:
-        iana = TIMEZONE_ALIASES[alias_key]
-        try:
-            ZoneInfo(iana)
-            return iana
-        except Exception:
-            return None
+    # Otherwise try alias mapping (alias targets are known-valid IANA names)
+    return TIMEZONE_ALIASES.get(tz_clean.upper())
 
-    return None
 
+@lru_cache(maxsize=256)
+def server_zone(server_tz_name: str | None) -> tuple[str, ZoneInfo]:
+    """(IANA name, ZoneInfo) for a stored server timezone, falling back to DEFAULT_SERVER_TZ."""
+    iana = normalize_timezone_input(server_tz_name) or DEFAULT_SERVER_TZ
+    return iana, get_zone(iana)
 
-def get_server_timezone_text(guild_id: int) -> str:
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT server_timezone FROM guild_settings WHERE guild_id = ?",
-        (guild_id,),
-    )
-    row = cur.fetchone()
-    conn.close()
 
-    return row["server_timezone"] if row else DEFAULT_SERVER_TZ
+def warm_zone_cache():
+    """Load the alias targets and common zones into get_zone's cache (blocking; run via to_thread)."""
+    for iana in {DEFAULT_SERVER_TZ, *TIMEZONE_ALIASES.values(), *COMMON_TZ_IANA}:
+        get_zone(iana)
 
 
-def set_server_timezone_text(guild_id: int, tz_text: str):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
+# ------------------------------------------------------------
+# Guild Config Cache
+# ------------------------------------------------------------
+class GuildConfigCache:
+    """
+    In-memory copy of the small per-guild settings tables
+    (guild_settings, guild_channels, guild_away_roles, guild_nickname_prefix).
+    Each guild is loaded lazily in one query and invalidated by the setters.
+    """
+
+    def __init__(self):
+        self._entries: dict[int, dict] = {}
+        self._lock = asyncio.Lock()
+
+    async def get(self, guild_id: int) -> dict:
+        entry = self._entries.get(guild_id)
+        if entry is not None:
+            return entry
+
+        async with self._lock:
+            entry = self._entries.get(guild_id)
+            if entry is None:
+                row = await db_fetchone(
+                    """
+                    SELECT
+                        (SELECT server_timezone FROM guild_settings WHERE guild_id = ?) AS server_timezone,
+                        (SELECT cmi_channel_id FROM guild_channels WHERE guild_id = ?) AS cmi_channel_id,
+                        (SELECT role_id FROM guild_away_roles WHERE guild_id = ?) AS away_role_id,
+                        (SELECT prefix FROM guild_nickname_prefix WHERE guild_id = ?) AS nickname_prefix
+                    """,
+                    (guild_id, guild_id, guild_id, guild_id),
+                )
+                entry = dict(row)
+                self._entries[guild_id] = entry
+            return entry
+
+    async def invalidate(self, guild_id: int):
+        # Taking the lock ensures an in-flight load can't re-cache stale values
+        async with self._lock:
+            self._entries.pop(guild_id, None)
+
+
+guild_config_cache = GuildConfigCache()
+
+
+async def get_server_timezone_text(guild_id: int) -> str:
+    config = await guild_config_cache.get(guild_id)
+    return config["server_timezone"] or DEFAULT_SERVER_TZ
+
+
+async def set_server_timezone_text(guild_id: int, tz_text: str):
+    await db_write(
         """
         INSERT INTO guild_settings (guild_id, server_timezone)
         VALUES (?, ?)
@@ -404,29 +713,22 @@ def set_server_timezone_text(guild_id: int, tz_text: str):
         """,
         (guild_id, tz_text),
     )
-    conn.commit()
-    conn.close()
+    await guild_config_cache.invalidate(guild_id)
 
 
-def get_user_timezone(guild_id: int, user_id: int) -> str | None:
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
+async def get_user_timezone(guild_id: int, user_id: int) -> str | None:
+    row = await db_fetchone(
         """
         SELECT timezone FROM user_timezones
         WHERE guild_id = ? AND user_id = ?
         """,
         (guild_id, user_id),
     )
-    row = cur.fetchone()
-    conn.close()
     return row["timezone"] if row else None
 
 
-def set_user_timezone(guild_id: int, user_id: int, tz_text: str):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
+async def set_user_timezone(guild_id: int, user_id: int, tz_text: str):
+    await db_write(
         """
         INSERT INTO user_timezones (guild_id, user_id, timezone)
         VALUES (?, ?, ?)
@@ -434,11 +736,9 @@ def set_user_timezone(guild_id: int, user_id: int, tz_text: str):
         """,
         (guild_id, user_id, tz_text),
     )
-    conn.commit()
-    conn.close()
 
 
-def resolve_effective_timezone(
+async def resolve_effective_timezone(
     guild_id: int,
     user_id: int,
     override_tz: str | None = None,
@@ -456,11 +756,11 @@ def resolve_effective_timezone(
         if iana:
             return iana, "override"
 
-    user_tz = get_user_timezone(guild_id, user_id)
+    user_tz = await get_user_timezone(guild_id, user_id)
     if user_tz:
         return user_tz, "user"
 
-    server_tz = get_server_timezone_text(guild_id)
+    server_tz = await get_server_timezone_text(guild_id)
     iana = normalize_timezone_input(server_tz)
     if iana:
         return iana, "server"
@@ -471,22 +771,13 @@ def resolve_effective_timezone(
 # ------------------------------------------------------------
 # CMI Channel / Away Role / Nickname Prefix Helpers
 # ------------------------------------------------------------
-def get_cmi_channel_id(guild_id: int) -> int | None:
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT cmi_channel_id FROM guild_channels WHERE guild_id = ?",
-        (guild_id,),
-    )
-    row = cur.fetchone()
-    conn.close()
-    return int(row["cmi_channel_id"]) if row and row["cmi_channel_id"] else None
+async def get_cmi_channel_id(guild_id: int) -> int | None:
+    config = await guild_config_cache.get(guild_id)
+    return int(config["cmi_channel_id"]) if config["cmi_channel_id"] else None
 
 
-def set_cmi_channel_id(guild_id: int, channel_id: int | None):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
+async def set_cmi_channel_id(guild_id: int, channel_id: int | None):
+    await db_write(
         """
         INSERT INTO guild_channels (guild_id, cmi_channel_id)
         VALUES (?, ?)
@@ -494,8 +785,60 @@ def set_cmi_channel_id(guild_id: int, channel_id: int | None):
         """,
         (guild_id, channel_id),
     )
-    conn.commit()
-    conn.close()
+    await guild_config_cache.invalidate(guild_id)
+
+
+# guild_id -> (channel_id, expires_at). Short TTL since permission changes aren't tracked.
+FALLBACK_CHANNEL_TTL = 60
+_fallback_channel_cache: dict[int, tuple[int | None, float]] = {}
+
+
+def find_fallback_channel(guild: discord.Guild) -> discord.TextChannel | None:
+    """
+    First text channel the bot can send messages in, used when the configured
+    channel is missing. Cached per guild because permissions_for() walks every
+    role overwrite on each channel.
+    """
+    cached = _fallback_channel_cache.get(guild.id)
+    if cached and cached[1] > monotonic():
+        channel = guild.get_channel(cached[0]) if cached[0] else None
+        if channel or cached[0] is None:
+            return channel
+
+    me = guild.me
+    channel = next(
+        (ch for ch in guild.text_channels if ch.permissions_for(me).send_messages),
+        None,
+    )
+    _fallback_channel_cache[guild.id] = (
+        channel.id if channel else None,
+        monotonic() + FALLBACK_CHANNEL_TTL,
+    )
+    return channel
+
+
+# guild_id -> {text channel name: channel id}, first channel wins on duplicate names.
+# Dropped by the channel create/update/delete listeners.
+_channel_name_cache: dict[int, dict[str, int]] = {}
+
+
+def find_text_channel(guild: discord.Guild, text: str) -> discord.TextChannel | None:
+    """Resolve a text channel from an ID or exact name typed into a settings modal."""
+    if text.isdigit():
+        channel = guild.get_channel(int(text))
+        if channel:
+            return channel if isinstance(channel, discord.TextChannel) else None
+
+    names = _channel_name_cache.get(guild.id)
+    if names is None:
+        names = {}
+        for ch in guild.text_channels:
+            names.setdefault(ch.name, ch.id)
+        _channel_name_cache[guild.id] = names
+
+    channel_id = names.get(text)
+    channel = guild.get_channel(channel_id) if channel_id else None
+    return channel if isinstance(channel, discord.TextChannel) else None
 
 
 async def enforce_cmi_channel(interaction: discord.Interaction) -> bool:
@@ -508,7 +851,7 @@ async def enforce_cmi_channel(interaction: discord.Interaction) -> bool:
     if not interaction.guild:
         return True
 
-    allowed_id = get_cmi_channel_id(interaction.guild.id)
+    allowed_id = await get_cmi_channel_id(interaction.guild.id)
     if not allowed_id:
         return True
     
@@ -516,12 +859,8 @@ async def enforce_cmi_channel(interaction: discord.Interaction) -> bool:
     allowed_channel = interaction.guild.get_channel(allowed_id)
     if not allowed_channel:
         # CMI channel was deleted, find fallback and notify
-        fallback = None
-        for ch in interaction.guild.text_channels:
-            if ch.permissions_for(interaction.guild.me).send_messages:
-                fallback = ch
-                break
-        
+        fallback = find_fallback_channel(interaction.guild)
+
         if fallback:
             # Notify leadership about the fallback
             if await is_leadership(interaction):
@@ -547,22 +886,13 @@ async def enforce_cmi_channel(interaction: discord.Interaction) -> bool:
 # ------------------------------------------------------------
 # Away Role Handling
 # ------------------------------------------------------------
-def get_away_role_id(guild_id: int) -> int | None:
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT role_id FROM guild_away_roles WHERE guild_id = ?",
-        (guild_id,),
-    )
-    row = cur.fetchone()
-    conn.close()
-    return int(row["role_id"]) if row and row["role_id"] else None
+async def get_away_role_id(guild_id: int) -> int | None:
+    config = await guild_config_cache.get(guild_id)
+    return int(config["away_role_id"]) if config["away_role_id"] else None
 
 
-def set_away_role_id(guild_id: int, role_id: int | None):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
+async def set_away_role_id(guild_id: int, role_id: int | None):
+    await db_write(
         """
         INSERT INTO guild_away_roles (guild_id, role_id)
         VALUES (?, ?)
@@ -570,8 +900,7 @@ def set_away_role_id(guild_id: int, role_id: int | None):
         """,
         (guild_id, role_id),
     )
-    conn.commit()
-    conn.close()
+    await guild_config_cache.invalidate(guild_id)
 
 
 # ------------------------------------------------------------
@@ -580,22 +909,33 @@ def set_away_role_id(guild_id: int, role_id: int | None):
 DEFAULT_NICK_PREFIX = "[CMI]"
 
 
-def get_nickname_prefix(guild_id: int) -> str:
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
-        "SELECT prefix FROM guild_nickname_prefix WHERE guild_id = ?",
-        (guild_id,),
-    )
-    row = cur.fetchone()
-    conn.close()
-    return row["prefix"] if row else DEFAULT_NICK_PREFIX
+async def get_nickname_prefix(guild_id: int) -> str:
+    config = await guild_config_cache.get(guild_id)
+    prefix = config["nickname_prefix"]
+    return prefix if prefix is not None else DEFAULT_NICK_PREFIX
 
 
-def set_nickname_prefix(guild_id: int, prefix: str):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
+@lru_cache(maxsize=128)
+def _prefix_strip_re(prefix: str) -> re.Pattern:
+    """Compiled pattern matching one or more leading copies of prefix (plus spacing)."""
+    return re.compile(rf"^(?:{re.escape(prefix)}\s*)+")
+
+
+def strip_nick_prefix(nick: str, prefix: str) -> str:
+    """Remove every leading copy of prefix from a nickname."""
+    return _prefix_strip_re(prefix).sub("", nick, count=1)
+
+
+def remove_nick_prefix(nick: str | None, prefix: str) -> str | None:
+    """Nickname with one leading prefix removed, or None if it doesn't carry the prefix."""
+    if not nick:
+        return None
+    stripped = nick.removeprefix(prefix)
+    return stripped.lstrip() if len(stripped) != len(nick) else None
+
+
+async def set_nickname_prefix(guild_id: int, prefix: str):
+    await db_write(
         """
         INSERT INTO guild_nickname_prefix (guild_id, prefix)
         VALUES (?, ?)
@@ -603,29 +943,22 @@ def set_nickname_prefix(guild_id: int, prefix: str):
         """,
         (guild_id, prefix),
     )
-    conn.commit()
-    conn.close()
+    await guild_config_cache.invalidate(guild_id)
 
 
 # ------------------------------------------------------------
 # Bot leadership permissions storage
 # ------------------------------------------------------------
-def get_bot_perm_roles(guild_id: int) -> list[int]:
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
+async def get_bot_perm_roles(guild_id: int) -> list[int]:
+    rows = await db_fetchall(
         "SELECT role_id FROM guild_bot_perm_roles WHERE guild_id = ?",
         (guild_id,),
     )
-    rows = cur.fetchall()
-    conn.close()
     return [int(r["role_id"]) for r in rows]
 
 
-def add_bot_perm_role(guild_id: int, role_id: int):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
+async def add_bot_perm_role(guild_id: int, role_id: int):
+    await db_write(
         """
         INSERT INTO guild_bot_perm_roles (guild_id, role_id)
         VALUES (?, ?)
@@ -633,37 +966,27 @@ def add_bot_perm_role(guild_id: int, role_id: int):
         """,
         (guild_id, role_id),
     )
-    conn.commit()
-    conn.close()
+    await bot_perm_cache.invalidate(guild_id)
 
 
-def remove_bot_perm_role(guild_id: int, role_id: int):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
+async def remove_bot_perm_role(guild_id: int, role_id: int):
+    await db_write(
         "DELETE FROM guild_bot_perm_roles WHERE guild_id = ? AND role_id = ?",
         (guild_id, role_id),
     )
-    conn.commit()
-    conn.close()
+    await bot_perm_cache.invalidate(guild_id)
 
 
-def get_bot_perm_users(guild_id: int) -> list[int]:
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
+async def get_bot_perm_users(guild_id: int) -> list[int]:
+    rows = await db_fetchall(
         "SELECT user_id FROM guild_bot_perm_users WHERE guild_id = ?",
         (guild_id,),
     )
-    rows = cur.fetchall()
-    conn.close()
     return [int(r["user_id"]) for r in rows]
 
 
-def add_bot_perm_user(guild_id: int, user_id: int):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
+async def add_bot_perm_user(guild_id: int, user_id: int):
+    await db_write(
         """
         INSERT INTO guild_bot_perm_users (guild_id, user_id)
         VALUES (?, ?)
@@ -671,43 +994,90 @@ def add_bot_perm_user(guild_id: int, user_id: int):
         """,
         (guild_id, user_id),
     )
-    conn.commit()
-    conn.close()
+    await bot_perm_cache.invalidate(guild_id)
 
 
-def remove_bot_perm_user(guild_id: int, user_id: int):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
+async def remove_bot_perm_user(guild_id: int, user_id: int):
+    await db_write(
         "DELETE FROM guild_bot_perm_users WHERE guild_id = ? AND user_id = ?",
         (guild_id, user_id),
     )
-    conn.commit()
-    conn.close()
+    await bot_perm_cache.invalidate(guild_id)
+
+
+class BotPermCache:
+    """
+    Per-guild (role ids, user ids) granted bot leadership, loaded lazily in
+    one query and invalidated by the add/remove helpers above.
+    """
+
+    def __init__(self):
+        self._entries: dict[int, tuple[frozenset[int], frozenset[int]]] = {}
+        self._lock = asyncio.Lock()
+
+    async def get(self, guild_id: int) -> tuple[frozenset[int], frozenset[int]]:
+        entry = self._entries.get(guild_id)
+        if entry is not None:
+            return entry
+
+        async with self._lock:
+            entry = self._entries.get(guild_id)
+            if entry is None:
+                rows = await db_fetchall(
+                    """
+                    SELECT 'role' AS kind, role_id AS id FROM guild_bot_perm_roles WHERE guild_id = ?
+                    UNION ALL
+                    SELECT 'user' AS kind, user_id AS id FROM guild_bot_perm_users WHERE guild_id = ?
+                    """,
+                    (guild_id, guild_id),
+                )
+                entry = (
+                    frozenset(int(r["id"]) for r in rows if r["kind"] == "role"),
+                    frozenset(int(r["id"]) for r in rows if r["kind"] == "user"),
+                )
+                self._entries[guild_id] = entry
+            return entry
+
+    async def invalidate(self, guild_id: int):
+        async with self._lock:
+            self._entries.pop(guild_id, None)
+
+
+bot_perm_cache = BotPermCache()
+
+
+async def is_user_or_role_permitted(guild_id: int, user_id: int, role_ids: Iterable[int]) -> bool:
+    """
+    True if the user, or any of the given roles, has been granted bot leadership.
+    role_ids is only consumed when the guild actually has role grants.
+    """
+    role_grants, user_grants = await bot_perm_cache.get(guild_id)
+    if user_id in user_grants:
+        return True
+    return bool(role_grants) and not role_grants.isdisjoint(role_ids)
 
 
 # ------------------------------------------------------------
 # Daily Report Settings
 # ------------------------------------------------------------
-def get_daily_report_settings(guild_id: int) -> tuple[bool, int | None, int]:
+# Guilds with daily reports switched on, kept in sync by set_daily_report_settings()
+# so the hourly task can skip the database when nobody uses the feature.
+_daily_enabled_guilds: set[int] = set()
+
+
+async def get_daily_report_settings(guild_id: int) -> tuple[bool, int | None, int]:
     """Returns (enabled, channel_id, report_hour)"""
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
+    row = await db_fetchone(
         "SELECT enabled, channel_id, report_hour FROM guild_daily_report_settings WHERE guild_id = ?",
         (guild_id,),
     )
-    row = cur.fetchone()
-    conn.close()
     if row:
         return (bool(row["enabled"]), row["channel_id"], row["report_hour"])
     return (False, None, 8)
 
 
-def set_daily_report_settings(guild_id: int, enabled: bool, channel_id: int | None, report_hour: int):
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
+async def set_daily_report_settings(guild_id: int, enabled: bool, channel_id: int | None, report_hour: int):
+    await db_write(
         """
         INSERT INTO guild_daily_report_settings (guild_id, enabled, channel_id, report_hour)
         VALUES (?, ?, ?, ?)
@@ -718,18 +1088,55 @@ def set_daily_report_settings(guild_id: int, enabled: bool, channel_id: int | No
         """,
         (guild_id, 1 if enabled else 0, channel_id, report_hour),
     )
-    conn.commit()
-    conn.close()
+    if enabled:
+        _daily_enabled_guilds.add(guild_id)
+    else:
+        _daily_enabled_guilds.discard(guild_id)
+
+
+async def load_daily_enabled_guilds():
+    """Populate _daily_enabled_guilds from the database (called once at startup)."""
+    rows = await db_fetchall(
+        "SELECT guild_id FROM guild_daily_report_settings WHERE enabled = 1"
+    )
+    _daily_enabled_guilds.clear()
+    _daily_enabled_guilds.update(row["guild_id"] for row in rows)
 
 
 # ------------------------------------------------------------
 # Away Role Recompute (single user)
 # ------------------------------------------------------------
+async def apply_away_change(
+    member: discord.Member,
+    role: discord.Role,
+    away: bool,
+    new_nick: str | None = None,
+):
+    """
+    Add or remove the away role, then set the nickname when new_nick is given.
+    The role change uses the per-role endpoint rather than edit(roles=...),
+    which would overwrite the whole role list with our cached copy and revert
+    concurrent changes by moderators or other bots. A nickname the bot can't
+    edit (e.g. the member outranks it) is skipped.
+    """
+    reason = "CMI: user currently away" if away else "CMI: user no longer away"
+    if away:
+        await member.add_roles(role, reason=reason)
+    else:
+        await member.remove_roles(role, reason=reason)
+
+    if new_nick is not None:
+        try:
+            await member.edit(nick=new_nick, reason=reason)
+        except discord.Forbidden:
+            pass
+
+
 async def recompute_away_role_for_user(guild: discord.Guild, user_id: int):
     """
     Ensures the away role and nickname prefix are correct for a single user.
     """
-    away_role_id = get_away_role_id(guild.id)
+    away_role_id = await get_away_role_id(guild.id)
     if not away_role_id:
         return
 
@@ -741,95 +1148,96 @@ async def recompute_away_role_for_user(guild: discord.Guild, user_id: int):
     if not member:
         return
 
-    # Use server timezone
-    server_tz_name = get_server_timezone_text(guild.id)
-    server_tz_iana = normalize_timezone_input(server_tz_name) or DEFAULT_SERVER_TZ
-    server_tz = ZoneInfo(server_tz_iana)
-    now = datetime.now(server_tz)
-
-    # Fetch CMIs
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
+    # Is any of the user's CMIs active right now?
+    now_ts = int(datetime.now(UTC).timestamp())
+    row = await db_fetchone(
         """
-        SELECT leave_dt, return_dt
+        SELECT 1
         FROM cmi_entries
         WHERE guild_id = ? AND user_id = ?
+          AND leave_ts <= ? AND (return_ts IS NULL OR return_ts >= ?)
+        LIMIT 1
         """,
-        (guild.id, user_id),
+        (guild.id, user_id, now_ts, now_ts),
     )
-    rows = cur.fetchall()
-    conn.close()
-
-    is_away = False
-    for row in rows:
-        try:
-            leave_dt = datetime.fromisoformat(row["leave_dt"])
-        except Exception:
-            continue
+    is_away = row is not None
 
-        try:
-            return_dt = (
-                datetime.fromisoformat(row["return_dt"]) if row["return_dt"] else None
-            )
-        except Exception:
-            return_dt = None
-
-        leave_local = leave_dt.astimezone(server_tz)
-        return_local = return_dt.astimezone(server_tz) if return_dt else None
-
-        if leave_local <= now and (return_local is None or return_local >= now):
-            is_away = True
-            break
-
-    prefix = get_nickname_prefix(guild.id)
+    prefix = await get_nickname_prefix(guild.id)
 
     # Apply role & nickname
+    has_role = role in member.roles
     if is_away:
-        if role not in member.roles:
-            try:
-                await member.add_roles(role, reason="CMI: user currently away")
-                logging.info(f"Added away role to {member.display_name} ({member.id}) in {guild.name}")
-            except Exception as e:
-                logging.error(f"Failed to add away role to {member.display_name} ({member.id}): {e}")
-
         # Add prefix to nickname
         current = member.nick or member.name
         
         # Only strip existing prefix if member already has the away role
         # (this means WE added it, not another bot)
-        if role in member.roles:
-            while current.startswith(prefix):
-                current = current[len(prefix):].lstrip()
+        if has_role:
+            current = strip_nick_prefix(current, prefix)
         
         # Now add our prefix
         new_nick = f"{prefix} {current}"
-        if len(new_nick) <= 32:
+        nick = new_nick if len(new_nick) <= 32 else None
+
+        if not has_role:
             try:
-                await member.edit(nick=new_nick, reason="CMI: applying prefix")
-                logging.info(f"Added prefix to {member.display_name} ({member.id}): {new_nick}")
+                await apply_away_change(member, role, True, nick)
+                logging.info(f"Added away role to {member.display_name} ({member.id}) in {guild.name}")
             except Exception as e:
-                logging.error(f"Failed to add prefix to {member.display_name} ({member.id}): {e}")
+                logging.error(f"Failed to add away role to {member.display_name} ({member.id}): {e}")
+        elif nick is not None:
+            try:
+                await member.edit(nick=nick, reason="CMI: applying prefix")
+                logging.info(f"Added prefix to {member.display_name} ({member.id}): {nick}")
+            except Exception as e:
+                logging.error(f"Failed to add prefix to {member.display_name} ({member.id}): {e}")
 
     else:
-        if role in member.roles:
-            try:
-                await member.remove_roles(role, reason="CMI: user no longer away")
-            except Exception:
-                pass
+        new_nick = remove_nick_prefix(member.nick, prefix)
 
-        current = member.nick
-        if current and current.startswith(prefix):
-            new_nick = current[len(prefix):].lstrip()
-            try:
+        try:
+            if has_role:
+                await apply_away_change(member, role, False, new_nick)
+            elif new_nick is not None:
                 await member.edit(nick=new_nick, reason="CMI: removing prefix")
-            except Exception:
-                pass
+        except Exception:
+            pass
+
+
+# Strong references: the event loop only keeps weak ones to running tasks
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _log_task_errors(task: asyncio.Task):
+    """Done-callback for fire-and-forget tasks: drop the reference, log any failure."""
+    _background_tasks.discard(task)
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc is not None:
+        logging.error(f"Background task {task.get_name()} failed", exc_info=exc)
+
+
+def schedule_away_recompute(guild: discord.Guild, user_id: int):
+    """
+    Run recompute_away_role_for_user in the background so role/nickname REST
+    calls don't delay the interaction response.
+    """
+    task = asyncio.create_task(
+        recompute_away_role_for_user(guild, user_id),
+        name=f"away-recompute-{guild.id}-{user_id}",
+    )
+    _background_tasks.add(task)
+    task.add_done_callback(_log_task_errors)
 
 
 # ------------------------------------------------------------
 # Periodic Sync Task
 # ------------------------------------------------------------
+# Guilds synced in parallel; keeps us well inside Discord's global rate limit
+AWAY_SYNC_CONCURRENCY = 8
+
+
 @tasks.loop(minutes=5)
 async def away_role_sync_task():
     """
@@ -838,120 +1246,128 @@ async def away_role_sync_task():
     """
     await bot.wait_until_ready()
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("SELECT guild_id, role_id FROM guild_away_roles")
-    rows = cur.fetchall()
-    conn.close()
+    # One query for every guild's away role + prefix, then everyone currently away
+    # (in SQLITE_IN_CHUNK-sized batches of guilds)
+    rows = await db_fetchall(
+        """
+        SELECT gar.guild_id, gar.role_id, gnp.prefix
+        FROM guild_away_roles gar
+        LEFT JOIN guild_nickname_prefix gnp ON gnp.guild_id = gar.guild_id
+        WHERE gar.role_id IS NOT NULL
+        """
+    )
 
+    targets = []
     for row in rows:
-        guild_id = row["guild_id"]
-        role_id = row["role_id"]
-
-        guild = bot.get_guild(guild_id)
-        if not guild or not role_id:
+        guild = bot.get_guild(row["guild_id"])
+        if not guild:
             continue
-
-        role = guild.get_role(role_id)
+        role = guild.get_role(row["role_id"])
         if not role:
             continue
+        targets.append((guild, role, row["prefix"]))
 
-        # Server timezone
-        server_tz_name = get_server_timezone_text(guild_id)
-        server_tz_iana = normalize_timezone_input(server_tz_name) or DEFAULT_SERVER_TZ
-        server_tz = ZoneInfo(server_tz_iana)
-        now = datetime.now(server_tz)
+    if not targets:
+        return
 
-        # Fetch all CMIs
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT DISTINCT user_id, leave_dt, return_dt
+    guild_ids = [guild.id for guild, _, _ in targets]
+    now_ts = int(datetime.now(UTC).timestamp())
+    away_by_guild: dict[int, set[int]] = {}
+    for i in range(0, len(guild_ids), SQLITE_IN_CHUNK):
+        chunk = guild_ids[i:i + SQLITE_IN_CHUNK]
+        away_rows = await db_fetchall(
+            f"""
+            SELECT DISTINCT guild_id, user_id
             FROM cmi_entries
-            WHERE guild_id = ?
+            WHERE guild_id IN ({",".join("?" * len(chunk))})
+              AND leave_ts <= ? AND (return_ts IS NULL OR return_ts >= ?)
             """,
-            (guild_id,),
+            (*chunk, now_ts, now_ts),
         )
-        user_rows = cur.fetchall()
-        conn.close()
+        for arow in away_rows:
+            away_by_guild.setdefault(arow["guild_id"], set()).add(arow["user_id"])
 
-        should_have_role = set()
+    semaphore = asyncio.Semaphore(AWAY_SYNC_CONCURRENCY)
 
-        for urow in user_rows:
-            uid = urow["user_id"]
+    async def sync_guild(guild: discord.Guild, role: discord.Role, prefix: str | None):
+        async with semaphore:
+            await _sync_guild_away_roles(
+                guild, role, prefix or DEFAULT_NICK_PREFIX, away_by_guild.get(guild.id, set())
+            )
+
+    results = await asyncio.gather(
+        *(sync_guild(guild, role, prefix) for guild, role, prefix in targets),
+        return_exceptions=True,
+    )
+    for (guild, _, _), result in zip(targets, results):
+        if isinstance(result, Exception):
+            logging.error(f"Away role sync failed for {guild.name} ({guild.id}): {result}")
 
-            try:
-                leave_dt = datetime.fromisoformat(urow["leave_dt"])
-            except Exception:
-                continue
 
+async def _sync_guild_away_roles(
+    guild: discord.Guild,
+    role: discord.Role,
+    prefix: str,
+    should_have_role: set[int],
+):
+    """Bring one guild's away role and nickname prefixes in line with its active CMIs."""
+    # Members who currently have the role (Role.members checks role ids
+    # directly instead of building each member's sorted roles list)
+    role_member_ids = {m.id for m in role.members}
+
+    # Build set of user IDs from CMI list and members with role
+    all_relevant_user_ids = should_have_role | role_member_ids
+
+    # Only check members who are in CMI list or currently have the role
+    for user_id in all_relevant_user_ids:
+        member = guild.get_member(user_id)
+        if not member:
+            continue
+
+        has = user_id in role_member_ids
+        should = user_id in should_have_role
+
+        if should and not has:
+            # Add role and prefixed nickname in one request
+            current = member.nick or member.name
+            new_nick = f"{prefix} {current}"
             try:
-                return_dt = (
-                    datetime.fromisoformat(urow["return_dt"]) if urow["return_dt"] else None
+                await apply_away_change(
+                    member, role, True, new_nick if len(new_nick) <= 32 else None
                 )
             except Exception:
-                return_dt = None
+                pass
 
-            leave_local = leave_dt.astimezone(server_tz)
-            return_local = return_dt.astimezone(server_tz) if return_dt else None
+        elif has and not should:
+            new_nick = remove_nick_prefix(member.nick, prefix)
+            try:
+                await apply_away_change(member, role, False, new_nick)
+            except Exception:
+                pass
 
-            if leave_local <= now and (return_local is None or return_local >= now):
-                should_have_role.add(uid)
 
-        # Get all members who currently have the role
-        members_with_role = [m for m in guild.members if role in m.roles]
-        
-        # Build set of user IDs from CMI list and members with role
-        all_relevant_user_ids = should_have_role | {m.id for m in members_with_role}
-        
-        prefix = get_nickname_prefix(guild.id)
-        
-        # Only check members who are in CMI list or currently have the role
-        for user_id in all_relevant_user_ids:
-            member = guild.get_member(user_id)
-            if not member:
-                continue
-            
-            has = role in member.roles
-            should = user_id in should_have_role
+# ------------------------------------------------------------
+# Event Loop Lag Monitor
+# ------------------------------------------------------------
+LOOP_LAG_WARN_SECONDS = 0.05
+last_loop_lag: float = 0.0
 
-            if should and not has:
-                try:
-                    await member.add_roles(role, reason="CMI: user currently away")
-                except Exception:
-                    pass
 
-                # Add prefix to nickname
-                current = member.nick or member.name
-                
-                # Only strip existing prefix if member already has the away role
-                # (this means WE added it, not another bot)
-                if has:
-                    while current.startswith(prefix):
-                        current = current[len(prefix):].lstrip()
-                
-                # Now add our prefix
-                new_nick = f"{prefix} {current}"
-                if len(new_nick) <= 32:
-                    try:
-                        await member.edit(nick=new_nick, reason="CMI: applying prefix")
-                    except Exception:
-                        pass
+@tasks.loop(seconds=1)
+async def loop_lag_monitor_task():
+    """
+    Sleep for one second and measure how late we wake up.
+    Anything blocking the event loop shows up as lag here.
+    """
+    global last_loop_lag
+    start = perf_counter()
+    await asyncio.sleep(1)
+    last_loop_lag = perf_counter() - start - 1
+    if last_loop_lag > LOOP_LAG_WARN_SECONDS:
+        logging.warning(f"Event loop lag: {last_loop_lag:.3f}s")
 
-            elif has and not should:
-                try:
-                    await member.remove_roles(role, reason="CMI: user no longer away")
-                except Exception:
-                    pass
 
-                current = member.nick
-                if current and current.startswith(prefix):
-                    new_nick = current[len(prefix):].lstrip()
-                    try:
-                        await member.edit(nick=new_nick, reason="CMI: removing prefix")
-                    except Exception:
-                        pass
+CLEANUP_BATCH_SIZE = 1000
 
 
 @tasks.loop(hours=24)
@@ -963,31 +1379,42 @@ async def cleanup_old_cmi_task():
     await bot.wait_until_ready()
 
     # Calculate cutoff date: 90 days ago from now
-    cutoff_date = datetime.now(timezone.utc) - timedelta(days=90)
-    cutoff_iso = cutoff_date.isoformat()
-
-    conn = get_db_connection()
-    cur = conn.cursor()
-    
-    # Delete CMI entries where return_dt exists and is older than 90 days
-    cur.execute(
-        """
-        DELETE FROM cmi_entries
-        WHERE return_dt IS NOT NULL
-        AND return_dt < ?
-        """,
-        (cutoff_iso,)
-    )
-    
-    deleted_count = cur.rowcount
-    conn.commit()
-    conn.close()
+    cutoff_date = datetime.now(UTC) - timedelta(days=90)
+
+    # Delete CMI entries where return_dt exists and is older than 90 days.
+    # Done in small batches so no single transaction holds the write lock
+    # (or grows the WAL) for long.
+    cutoff_ts = int(cutoff_date.timestamp())
+    deleted_count = 0
+    while True:
+        cur = await db_execute(
+            """
+            DELETE FROM cmi_entries
+            WHERE rowid IN (
+                SELECT rowid FROM cmi_entries
+                WHERE return_ts IS NOT NULL
+                AND return_ts < ?
+                LIMIT ?
+            )
+            """,
+            (cutoff_ts, CLEANUP_BATCH_SIZE),
+        )
+        deleted_count += cur.rowcount
+        if cur.rowcount < CLEANUP_BATCH_SIZE:
+            break
+        await asyncio.sleep(0)
 
     if deleted_count > 0:
         logging.info(f"Cleanup task: Deleted {deleted_count} old CMI entries (return date > 90 days ago)")
 
 
-@tasks.loop(hours=1)
+# Wake at the top of every UTC hour. Report hours are stored in each server's
+# local timezone, so the per-guild hour check stays in Python; half-hour
+# offsets still see every local hour exactly once.
+DAILY_REPORT_TIMES = [time(hour=h, tzinfo=UTC) for h in range(24)]
+
+
+@tasks.loop(time=DAILY_REPORT_TIMES)
 async def daily_report_task():
     """
     Check every hour if any guild needs their daily CMI report sent.
@@ -995,17 +1422,20 @@ async def daily_report_task():
     """
     await bot.wait_until_ready()
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
+    if not _daily_enabled_guilds:
+        return
+
+    # Report settings, server timezone and CMI channel for every enabled guild in one query
+    rows = await db_fetchall(
         """
-        SELECT guild_id, channel_id, report_hour
-        FROM guild_daily_report_settings
-        WHERE enabled = 1
+        SELECT drs.guild_id, drs.channel_id, drs.report_hour,
+               gs.server_timezone, gc.cmi_channel_id
+        FROM guild_daily_report_settings drs
+        LEFT JOIN guild_settings gs ON gs.guild_id = drs.guild_id
+        LEFT JOIN guild_channels gc ON gc.guild_id = drs.guild_id
+        WHERE drs.enabled = 1
         """
     )
-    rows = cur.fetchall()
-    conn.close()
 
     for row in rows:
         guild_id = row["guild_id"]
@@ -1017,9 +1447,8 @@ async def daily_report_task():
             continue
 
         # Get server timezone
-        server_tz_name = get_server_timezone_text(guild_id)
-        server_tz_iana = normalize_timezone_input(server_tz_name) or DEFAULT_SERVER_TZ
-        server_tz = ZoneInfo(server_tz_iana)
+        server_tz_name = row["server_timezone"] or DEFAULT_SERVER_TZ
+        server_tz_iana, server_tz = server_zone(server_tz_name)
         
         # Check if current hour matches report hour
         now = datetime.now(server_tz)
@@ -1027,30 +1456,27 @@ async def daily_report_task():
             continue
 
         # Determine target channel with fallback logic
+        cmi_channel_id = row["cmi_channel_id"]
         if channel_id:
             channel = guild.get_channel(channel_id)
             if not channel:
                 # Daily report channel was deleted, fallback to CMI channel
-                channel_id_from_settings = get_cmi_channel_id(guild_id)
-                channel = guild.get_channel(channel_id_from_settings) if channel_id_from_settings else None
+                channel = guild.get_channel(cmi_channel_id) if cmi_channel_id else None
         else:
-            channel_id_from_settings = get_cmi_channel_id(guild_id)
-            channel = guild.get_channel(channel_id_from_settings) if channel_id_from_settings else None
+            channel = guild.get_channel(cmi_channel_id) if cmi_channel_id else None
         
         # If still no channel, try to find first accessible text channel
         if not channel:
-            for ch in guild.text_channels:
-                if ch.permissions_for(guild.me).send_messages:
-                    channel = ch
-                    # Notify leadership about fallback
-                    try:
-                        await ch.send(
-                            "⚠️ **Leadership Notice**: The configured CMI/daily report channel was deleted. "
-                            f"Using {ch.mention} as fallback. Please reconfigure channels with `/cmi leadership`."
-                        )
-                    except Exception:
-                        pass
-                    break
+            channel = find_fallback_channel(guild)
+            if channel:
+                # Notify leadership about fallback
+                try:
+                    await channel.send(
+                        "⚠️ **Leadership Notice**: The configured CMI/daily report channel was deleted. "
+                        f"Using {channel.mention} as fallback. Please reconfigure channels with `/cmi leadership`."
+                    )
+                except Exception:
+                    pass
         
         if not channel:
             logging.warning(f"No accessible channel found for daily report in {guild.name}")
@@ -1074,21 +1500,17 @@ async def generate_daily_cmi_report(guild: discord.Guild, server_tz: ZoneInfo) -
     now = datetime.now(server_tz)
     end_date = now + timedelta(days=7)
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
+    rows = await db_fetchall(
         """
-        SELECT id, user_id, leave_dt, return_dt, reason, timezone_label, created_at
+        SELECT user_id, leave_ts, return_ts, reason
         FROM cmi_entries
         WHERE guild_id = ?
-        AND leave_dt <= ?
-        AND (return_dt IS NULL OR return_dt >= ?)
-        ORDER BY leave_dt ASC
+        AND leave_ts <= ?
+        AND (return_ts IS NULL OR return_ts >= ?)
+        ORDER BY leave_ts ASC
         """,
-        (guild.id, end_date.isoformat(), now.isoformat()),
+        (guild.id, int(end_date.timestamp()), int(now.timestamp())),
     )
-    rows = cur.fetchall()
-    conn.close()
 
     if not rows:
         return "📊 **Daily CMI Report**\n\nNo active or upcoming CMIs for the next 7 days."
@@ -1098,16 +1520,19 @@ async def generate_daily_cmi_report(guild: discord.Guild, server_tz: ZoneInfo) -
 
     for row in rows:
         user_id = row["user_id"]
-        leave_dt = datetime.fromisoformat(row["leave_dt"])
-        return_dt = datetime.fromisoformat(row["return_dt"]) if row["return_dt"] else None
         reason = row["reason"] or "No reason provided"
 
-        leave_local = leave_dt.astimezone(server_tz)
-        return_local = return_dt.astimezone(server_tz) if return_dt else None
+        # Stored as UTC epoch seconds; convert straight into the server timezone
+        leave_local = datetime.fromtimestamp(row["leave_ts"], server_tz)
+        return_local = (
+            datetime.fromtimestamp(row["return_ts"], server_tz)
+            if row["return_ts"] is not None
+            else None
+        )
 
         # Format dates
-        leave_str = leave_local.strftime("%d/%m/%Y %H:%M")
-        return_str = return_local.strftime("%d/%m/%Y %H:%M") if return_local else "Until further notice"
+        leave_str = fmt_dmyhm(leave_local)
+        return_str = fmt_dmyhm(return_local) if return_local else "Until further notice"
 
         # Get member info without tagging
         member = guild.get_member(user_id)
@@ -1134,27 +1559,14 @@ async def generate_csv_export(guild: discord.Guild) -> discord.File:
     import csv
     import io
 
-    server_tz_name = get_server_timezone_text(guild.id)
-    server_tz_iana = normalize_timezone_input(server_tz_name) or DEFAULT_SERVER_TZ
-    server_tz = ZoneInfo(server_tz_iana)
+    server_tz_name = await get_server_timezone_text(guild.id)
+    server_tz_iana, server_tz = server_zone(server_tz_name)
     now = datetime.now(server_tz)
+    now_ts = int(now.timestamp())
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        SELECT id, user_id, leave_dt, return_dt, reason, timezone_label, created_at, created_by_user_id
-        FROM cmi_entries
-        WHERE guild_id = ?
-        ORDER BY leave_dt DESC
-        """,
-        (guild.id,),
-    )
-    rows = cur.fetchall()
-    conn.close()
-
-    # Create CSV in memory
-    output = io.StringIO()
+    # Write the CSV straight into the bytes buffer that gets uploaded
+    buffer = io.BytesIO()
+    output = io.TextIOWrapper(buffer, encoding="utf-8", newline="")
     writer = csv.writer(output)
     
     # Write header
@@ -1171,39 +1583,51 @@ async def generate_csv_export(guild: discord.Guild) -> discord.File:
         "Created By"
     ])
 
-    # Write data rows
-    for row in rows:
+    # Write data rows, streaming them from the database
+    rows = db_iterate(
+        """
+        SELECT id, user_id, leave_ts, return_ts, reason, timezone_label, created_at, created_by_user_id
+        FROM cmi_entries
+        WHERE guild_id = ?
+        ORDER BY leave_ts DESC
+        """,
+        (guild.id,),
+    )
+    async for row in rows:
         user_id = row["user_id"]
         member = guild.get_member(user_id)
         username = f"{member.name}" if member else f"Unknown User ({user_id})"
 
-        leave_dt = datetime.fromisoformat(row["leave_dt"])
-        return_dt = datetime.fromisoformat(row["return_dt"]) if row["return_dt"] else None
+        # Status and duration come straight from the epoch columns;
+        # only the display strings need a timezone conversion
+        leave_ts = row["leave_ts"]
+        return_ts = row["return_ts"]
         reason = row["reason"] or ""
-        
-        leave_local = leave_dt.astimezone(server_tz)
-        return_local = return_dt.astimezone(server_tz) if return_dt else None
 
-        leave_str = leave_local.strftime("%d/%m/%Y %H:%M")
-        return_str = return_local.strftime("%d/%m/%Y %H:%M") if return_local else "Indefinite"
+        leave_str = fmt_dmyhm(datetime.fromtimestamp(leave_ts, server_tz))
+        return_str = (
+            fmt_dmyhm(datetime.fromtimestamp(return_ts, server_tz))
+            if return_ts is not None
+            else "Indefinite"
+        )
 
         # Determine status
-        if leave_local > now:
+        if leave_ts > now_ts:
             status = "Scheduled"
-        elif return_local and return_local < now:
+        elif return_ts is not None and return_ts < now_ts:
             status = "Completed"
         else:
             status = "Active"
 
         # Calculate days away
-        if return_dt:
-            days_away = (return_dt - leave_dt).days
+        if return_ts is not None:
+            days_away = (return_ts - leave_ts) // 86400
         else:
             days_away = "Indefinite"
 
         # Created date
         created_at = datetime.fromisoformat(row["created_at"])
-        created_str = created_at.strftime("%d/%m/%Y %H:%M")
+        created_str = fmt_dmyhm(created_at)
 
         # Created by (handles NULL for old CMIs)
         created_by_id = row["created_by_user_id"]
@@ -1228,13 +1652,14 @@ async def generate_csv_export(guild: discord.Guild) -> discord.File:
             created_by
         ])
 
-    # Create file
-    output.seek(0)
+    # Create file (detach so closing the text wrapper can't close the buffer)
+    output.flush()
+    output.detach()
+    buffer.seek(0)
     file = discord.File(
-        io.BytesIO(output.getvalue().encode('utf-8')),
+        buffer,
         filename=f"cmi_export_{guild.name}_{now.strftime('%Y%m%d')}.csv"
     )
-    output.close()
 
     return file
 
@@ -1242,6 +1667,76 @@ async def generate_csv_export(guild: discord.Guild) -> discord.File:
 # ------------------------------------------------------------
 # Date Parsing
 # ------------------------------------------------------------
+_MONTH_NAMES = (
+    "january", "february", "march", "april", "may", "june",
+    "july", "august", "september", "october", "november", "december",
+)
+_MONTHS = {name: i for i, name in enumerate(_MONTH_NAMES, 1)}
+_MONTHS.update({name[:3]: i for i, name in enumerate(_MONTH_NAMES, 1)})
+
+# One anchored pattern for every supported format:
+# 2026-01-31 | 31/01/2026, 31-01-26 | 31 Jan [2026] | Jan 31 [26]
+_DATE_RE = re.compile(
+    r"^(?:(?P<iso_y>\d{4})-(?P<iso_m>\d{1,2})-(?P<iso_d>\d{1,2})"
+    r"|(?P<num_d>\d{1,2})(?P<sep>[/-])(?P<num_m>\d{1,2})(?P=sep)(?P<num_y>\d{4}|\d{2})"
+    r"|(?P<dm_d>\d{1,2})\s+(?P<dm_mon>[A-Za-z]+)(?:\s+(?P<dm_y>\d{4}|\d{2}))?"
+    r"|(?P<md_mon>[A-Za-z]+)\s+(?P<md_d>\d{1,2})(?:\s+(?P<md_y>\d{4}|\d{2}))?)$"
+)
+
+# Most common first: ISO, then numeric day-first
+_DATE_FORMATS = (
+    "%Y-%m-%d",
+    "%d/%m/%Y",
+    "%d-%m-%Y",
+    "%d %b",
+    "%b %d",
+    "%d %B",
+    "%B %d",
+    "%d %b %Y",
+    "%b %d %Y",
+    "%d %B %Y",
+    "%B %d %Y",
+    "%d %b %y",  # Added: 2-digit year support (e.g., "1 Jan 26")
+    "%b %d %y",
+    "%d %B %y",
+    "%B %d %y",
+    "%d/%m/%y",  # Added: 2-digit year support (e.g., "01/01/26")
+    "%d-%m-%y",
+)
+
+
+def _date_from_match(match: re.Match, today: date) -> date | None:
+    """Build a date from a _DATE_RE match, or None if it isn't a real date."""
+    if match["iso_y"]:
+        year, month, day = match["iso_y"], int(match["iso_m"]), match["iso_d"]
+    elif match["num_y"]:
+        year, month, day = match["num_y"], int(match["num_m"]), match["num_d"]
+    else:
+        mon = match["dm_mon"] or match["md_mon"]
+        month = _MONTHS.get(mon.lower())
+        if month is None:
+            return None
+        year = match["dm_y"] or match["md_y"]
+        day = match["dm_d"] or match["md_d"]
+
+    day = int(day)
+    try:
+        if year is None:
+            # No year given: next occurrence of that day/month
+            result = date(today.year, month, day)
+            if result < today:
+                result = date(today.year + 1, month, day)
+            return result
+
+        year = int(year)
+        if year < 100:
+            # Same pivot as strptime's %y
+            year += 2000 if year < 69 else 1900
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
 def parse_date(date_str: str | None, tz_info: ZoneInfo | None = None):
     """Parse flexible date formats into a date object.
     
@@ -1267,36 +1762,36 @@ def parse_date(date_str: str | None, tz_info: ZoneInfo | None = None):
         result = (now + timedelta(days=1)).date()
         return result
     
-    # Title case for month names
-    date_str = date_str.title()
+    return _parse_date_cached(date_str, date.today().toordinal())
 
-    formats = [
-        "%Y-%m-%d",
-        "%d/%m/%Y",
-        "%d-%m-%Y",
-        "%d %b",
-        "%b %d",
-        "%d %B",
-        "%B %d",
-        "%d %b %Y",
-        "%b %d %Y",
-        "%d %B %Y",
-        "%B %d %Y",
-        "%d %b %y",  # Added: 2-digit year support (e.g., "1 Jan 26")
-        "%b %d %y",
-        "%d %B %y",
-        "%B %d %y",
-        "%d/%m/%y",  # Added: 2-digit year support (e.g., "01/01/26")
-        "%d-%m-%y",
-    ]
 
-    for fmt in formats:
+@lru_cache(maxsize=1024)
+def _parse_date_cached(date_str: str, today_ordinal: int) -> date | None:
+    """
+    Explicit-date half of parse_date. Today's date is part of the cache key
+    because year-less inputs roll over to next year once their day has passed.
+    """
+    today = date.fromordinal(today_ordinal)
+
+    # Canonical ISO (YYYY-MM-DD) is handled natively in C
+    if len(date_str) == 10 and date_str[4] == "-" and date_str[7] == "-":
+        try:
+            return date.fromisoformat(date_str)
+        except ValueError:
+            pass
+
+    match = _DATE_RE.match(date_str)
+    if match:
+        return _date_from_match(match, today)
+
+    # Fallback for anything the regex doesn't cover
+    date_str = date_str.title()
+    for fmt in _DATE_FORMATS:
         try:
             parsed = datetime.strptime(date_str, fmt)
 
             # Handle missing year (default 1900)
             if parsed.year == 1900:
-                today = datetime.now().date()
                 parsed = parsed.replace(year=today.year)
                 if parsed.date() < today:
                     parsed = parsed.replace(year=today.year + 1)
@@ -1308,12 +1803,18 @@ def parse_date(date_str: str | None, tz_info: ZoneInfo | None = None):
 
     return None
 
-    return None
-
 
 # ------------------------------------------------------------
 # Time Parsing
 # ------------------------------------------------------------
+_TIME_FORMATS_24H = ("%H:%M", "%H")
+_TIME_FORMATS_12H = ("%I:%M %p", "%I %p")
+_AMPM_RE = re.compile(r"(am|pm)$")
+# "9", "09:00", "9am", "9:30 pm" -- covers nearly every modal entry
+_TIME_RE = re.compile(r"(\d{1,2})(?::(\d{1,2}))?(?:\s*([ap]m))?")
+
+
+@lru_cache(maxsize=1024)
 def parse_time(time_str: str | None):
     """Parse flexible time formats into a time object."""
     if not time_str:
@@ -1321,16 +1822,27 @@ def parse_time(time_str: str | None):
 
     time_str = time_str.strip().lower()
 
-    # Normalize "9am" → "9 am"
-    if time_str.endswith("am") or time_str.endswith("pm"):
-        time_str = time_str[:-2] + " " + time_str[-2:]
-
-    formats = [
-        "%H:%M",
-        "%H",
-        "%I:%M %p",
-        "%I %p",
-    ]
+    match = _TIME_RE.fullmatch(time_str)
+    if match:
+        hour = int(match[1])
+        minute = int(match[2]) if match[2] else 0
+        ampm = match[3]
+        if ampm:
+            if not 1 <= hour <= 12:
+                return None
+            hour = hour % 12 + (12 if ampm == "pm" else 0)
+        if hour > 23 or minute > 59:
+            return None
+        return time(hour, minute)
+
+    # Normalize "9am" → "9 am"; only 12-hour formats can match an am/pm suffix
+    time_str, has_ampm = _AMPM_RE.subn(r" \1", time_str)
+    if has_ampm:
+        formats = _TIME_FORMATS_12H
+    elif time_str.isdigit():
+        formats = ("%H",)
+    else:
+        formats = _TIME_FORMATS_24H
 
     for fmt in formats:
         try:
@@ -1350,33 +1862,30 @@ async def is_leadership(interaction: discord.Interaction) -> bool:
     if not interaction.guild:
         return False
 
-    perms = interaction.user.guild_permissions
+    user = interaction.user
+    perms = user.guild_permissions
     if perms.administrator or perms.manage_guild:
         return True
 
-    # Check custom leadership roles/users
-    guild_id = interaction.guild.id
-    role_ids = set(get_bot_perm_roles(guild_id))
-    user_ids = set(get_bot_perm_users(guild_id))
-
-    if role_ids and any(r.id in role_ids for r in interaction.user.roles):
-        return True
-
-    if interaction.user.id in user_ids:
-        return True
-
-    return False
+    # Check custom leadership roles/users (Member.roles builds a sorted list per access)
+    user_roles = user.roles
+    return await is_user_or_role_permitted(
+        interaction.guild.id,
+        user.id,
+        (r.id for r in user_roles),
+    )
 
 
 def is_owner(user_id: int) -> bool:
     """Check if user is a bot owner."""
-    return user_id in OWNER_IDS and user_id is not None
+    return user_id in OWNER_IDS
 
 
 # ------------------------------------------------------------
 # Timezone Autocomplete Helper
 # ------------------------------------------------------------
-COMMON_TZ_IANA = [
+# Ordered: the empty autocomplete box lists these first
+COMMON_TZ_IANA = (
     "Pacific/Auckland",
     "Australia/Sydney",
     "Australia/Melbourne",
@@ -1387,33 +1896,59 @@ COMMON_TZ_IANA = [
     "America/Los_Angeles",
     "Europe/London",
     "Europe/Berlin",
+)
+
+# (lowercased label, display name, value) for every autocomplete candidate,
+# built once instead of on every keystroke
+_TZ_CANDIDATES: list[tuple[str, str, str]] = [
+    (label.lower(), label, label) for label in COMMON_TZ_IANA
+] + [
+    (alias.lower(), f"{alias} ({iana})", iana) for alias, iana in TIMEZONE_ALIASES.items()
 ]
 
+# What an empty box shows (every candidate matches ""), built once
+_TZ_EMPTY_CHOICES: list[app_commands.Choice] = [
+    app_commands.Choice(name=display, value=value) for _, display, value in _TZ_CANDIDATES[:25]
+]
+
+# Candidates sorted by lowercased label so prefix typing ("aus" -> Australia/*)
+# can bisect straight to its matches
+_TZ_SORTED: list[tuple[str, app_commands.Choice]] = sorted(
+    (label_lower, app_commands.Choice(name=display, value=value))
+    for label_lower, display, value in _TZ_CANDIDATES
+)
+_TZ_SORTED_KEYS: list[str] = [label_lower for label_lower, _ in _TZ_SORTED]
+
 
 async def timezone_autocomplete(
     interaction: discord.Interaction,
     current: str,
 ):
     """Autocomplete for timezone inputs."""
-    candidates = set(COMMON_TZ_IANA)
-    candidates.update(TIMEZONE_ALIASES.keys())
+    if not current:
+        return _TZ_EMPTY_CHOICES
 
     current_lower = current.lower()
     results = []
+    seen = set()
 
-    for label in candidates:
-        if current_lower in label.lower():
-            if label in TIMEZONE_ALIASES:
-                value = TIMEZONE_ALIASES[label]
-                display = f"{label} ({value})"
-            else:
-                value = label
-                display = label
+    # Prefix matches first: bisect to the first candidate >= the typed text
+    # and walk forward while it still matches
+    for i in range(bisect_left(_TZ_SORTED_KEYS, current_lower), len(_TZ_SORTED)):
+        label_lower, choice = _TZ_SORTED[i]
+        if not label_lower.startswith(current_lower):
+            break
+        results.append(choice)
+        seen.add(label_lower)
+        if len(results) >= 25:
+            return results
 
+    # Top up with substring matches (e.g. "york" -> America/New_York)
+    for label_lower, display, value in _TZ_CANDIDATES:
+        if label_lower not in seen and current_lower in label_lower:
             results.append(app_commands.Choice(name=display, value=value))
-
-        if len(results) >= 25:
-            break
+            if len(results) >= 25:
+                break
 
     if not results and current:
         results.append(app_commands.Choice(name=current, value=current))
@@ -1426,6 +1961,157 @@ async def timezone_autocomplete(
 # ------------------------------------------------------------
 # Advanced User Resolver
 # ------------------------------------------------------------
+# Fetches (name, nick) in C for the index build loop
+_get_name_nick = attrgetter("name", "nick")
+
+# guild_id -> (member count, exact-name index, lowercase-name index, lowercased names).
+# Dropped by the member join/update/remove listeners; the member count
+# also catches the cache being built before the guild finished chunking.
+_guild_name_index_cache: dict[
+    int, tuple[int, dict[str, list], dict[str, list], list[tuple[str, str | None, discord.Member]]]
+] = {}
+
+
+def _guild_name_index(
+    guild: discord.Guild,
+) -> tuple[dict[str, list], dict[str, list], list[tuple[str, str | None, discord.Member]]]:
+    """
+    Lookups for resolve_users_advanced, built in one pass over the members:
+    exact name/nick -> members, lowercase name/nick -> members, and
+    (name_lower, nick_lower, member) rows for the partial-match scan.
+    """
+    cached = _guild_name_index_cache.get(guild.id)
+    if cached is not None and cached[0] == len(guild.members):
+        return cached[1], cached[2], cached[3]
+
+    by_exact: dict[str, list] = {}
+    by_lower: dict[str, list] = {}
+    lowered: list[tuple[str, str | None, discord.Member]] = []
+    members = guild.members
+    for member, (name, nick) in zip(members, map(_get_name_nick, members)):
+        name_lower = name.lower()
+        nick_lower = nick.lower() if nick else None
+        exact_keys = {name}
+        lower_keys = {name_lower}
+        if nick:
+            exact_keys.add(nick)
+            lower_keys.add(nick_lower)
+        for key in exact_keys:
+            by_exact.setdefault(key, []).append(member)
+        for key in lower_keys:
+            by_lower.setdefault(key, []).append(member)
+        lowered.append((name_lower, nick_lower, member))
+
+    _guild_name_index_cache[guild.id] = (len(guild.members), by_exact, by_lower, lowered)
+    return by_exact, by_lower, lowered
+
+
+def _fold_name(name: str) -> str:
+    """Casefold and strip accents ("José" -> "jose") for member search."""
+    decomposed = unicodedata.normalize("NFKD", name)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def _bigrams(text: str) -> set[str]:
+    """Adjacent character pairs, e.g. "bob" -> {"bo", "ob"}."""
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+# guild_id -> (member count, fuzzy choices, choice owners, bigram -> choice indices).
+# Built on the first fuzzy search in a guild; shares invalidation with the name index.
+_guild_fuzzy_index_cache: dict[
+    int, tuple[int, list[str], list[discord.Member], dict[str, list[int]]]
+] = {}
+
+
+def _guild_fuzzy_index(
+    guild: discord.Guild,
+    lowered: list[tuple[str, str | None, discord.Member]],
+) -> tuple[list[str], list[discord.Member], dict[str, list[int]]]:
+    """
+    Every lowercased username and nickname as a fuzzy-match choice, the member
+    each belongs to, and a bigram index over the choices for prefiltering.
+    """
+    cached = _guild_fuzzy_index_cache.get(guild.id)
+    if cached is not None and cached[0] == len(guild.members):
+        return cached[1], cached[2], cached[3]
+
+    choices: list[str] = []
+    owners: list[discord.Member] = []
+    by_bigram: dict[str, list[int]] = {}
+    for name_lower, nick_lower, member in lowered:
+        for text in (name_lower, nick_lower) if nick_lower else (name_lower,):
+            index = len(choices)
+            choices.append(text)
+            owners.append(member)
+            for gram in _bigrams(text):
+                by_bigram.setdefault(gram, []).append(index)
+
+    _guild_fuzzy_index_cache[guild.id] = (len(guild.members), choices, owners, by_bigram)
+    return choices, owners, by_bigram
+
+
+# guild_id -> (member count, member ids, folded name sets, fuzzy-ready display names).
+# Used by the cog's prompt_for_member; shares invalidation with the name index.
+_guild_search_index_cache: dict[
+    int, tuple[int, list[int], list[frozenset[str]], list[str]]
+] = {}
+
+
+def _guild_search_index(
+    guild: discord.Guild,
+) -> tuple[list[int], list[frozenset[str]], list[str]]:
+    """
+    Parallel lists for prompt_for_member over the guild's non-bot members:
+    member ids, each member's folded {username, display name, global name},
+    and display names preprocessed for rapidfuzz.
+    """
+    cached = _guild_search_index_cache.get(guild.id)
+    if cached is not None and cached[0] == len(guild.members):
+        return cached[1], cached[2], cached[3]
+
+    ids: list[int] = []
+    name_sets: list[frozenset[str]] = []
+    fuzzy_names: list[str] = []
+    for member in guild.members:
+        if member.bot:
+            continue
+        names = {_fold_name(member.name)}
+        if member.display_name:
+            names.add(_fold_name(member.display_name))
+        if member.global_name:
+            names.add(_fold_name(member.global_name))
+        ids.append(member.id)
+        name_sets.append(frozenset(names))
+        fuzzy_names.append(fuzz_utils.default_process(_fold_name(member.display_name or member.name)))
+
+    _guild_search_index_cache[guild.id] = (len(guild.members), ids, name_sets, fuzzy_names)
+    return ids, name_sets, fuzzy_names
+
+
+def invalidate_guild_name_index(guild_id: int | None = None):
+    """Drop one guild's name indexes, or all of them (e.g. after a username change)."""
+    if guild_id is None:
+        _guild_name_index_cache.clear()
+        _guild_search_index_cache.clear()
+        _guild_fuzzy_index_cache.clear()
+    else:
+        _guild_name_index_cache.pop(guild_id, None)
+        _guild_search_index_cache.pop(guild_id, None)
+        _guild_fuzzy_index_cache.pop(guild_id, None)
+    # Resolved results are derived from the index, so they go stale with it
+    _resolve_cache.clear()
+
+
+# (guild_id, query) -> (monotonic ts, exact matches, partial matches); lets
+# repeated searches for the same text skip the member scan for a few seconds
+RESOLVE_CACHE_TTL = 5
+RESOLVE_CACHE_MAX = 256
+# Minimum rapidfuzz score (0-100) for the resolver's typo fallback
+RESOLVE_FUZZY_CUTOFF = 60
+_resolve_cache: OrderedDict[tuple[int, str], tuple[float, list, list]] = OrderedDict()
+
+
 def resolve_users_advanced(guild: discord.Guild, query: str):
     """
     Resolve users by:
@@ -1436,8 +2122,29 @@ def resolve_users_advanced(guild: discord.Guild, query: str):
     - username#discriminator
     - Case-insensitive exact match
     - Partial match (username or nickname)
+    - Fuzzy match fallback (typos)
     """
     query = query.strip()
+    key = (guild.id, query)
+    now = monotonic()
+
+    cached = _resolve_cache.get(key)
+    if cached is not None and now - cached[0] < RESOLVE_CACHE_TTL:
+        _resolve_cache.move_to_end(key)
+        return cached[1], cached[2]
+
+    exact_matches, partial_matches = _resolve_users_uncached(guild, query)
+
+    _resolve_cache[key] = (now, exact_matches, partial_matches)
+    _resolve_cache.move_to_end(key)
+    if len(_resolve_cache) > RESOLVE_CACHE_MAX:
+        _resolve_cache.popitem(last=False)
+
+    return exact_matches, partial_matches
+
+
+def _resolve_users_uncached(guild: discord.Guild, query: str):
+    """Run the resolve_users_advanced passes against the guild's name index."""
     query_lower = query.lower()
 
     exact_matches = []
@@ -1456,61 +2163,92 @@ def resolve_users_advanced(guild: discord.Guild, query: str):
             return exact_matches, partial_matches
 
     # 2. Mention <@ID>
-    if query.startswith("<@") and query.endswith(">"):
-        inner = query.replace("<@", "").replace(">", "").replace("!", "")
-        if inner.isdigit():
-            user = guild.get_member(int(inner))
-            if user:
-                exact_matches.append(user)
-                return exact_matches, partial_matches
+    mention_match = _MENTION_RE.fullmatch(query)
+    if mention_match:
+        user = guild.get_member(int(mention_match.group(1)))
+        if user:
+            exact_matches.append(user)
+            return exact_matches, partial_matches
 
-    # 3. Exact username / nickname / username#discriminator
-    for member in guild.members:
-        if (
-            member.name == query
-            or (member.nick and member.nick == query)
-            or f"{member.name}#{member.discriminator}" == query
-        ):
-            exact_matches.append(member)
+    by_exact, by_lower, lowered = _guild_name_index(guild)
 
+    # 3. Exact username / nickname / username#discriminator
+    exact_matches = list(by_exact.get(query, ()))
+    if "#" in query:
+        # Split once instead of indexing a name#discriminator key per member
+        q_name, _, q_disc = query.partition("#")
+        exact_matches += [
+            m
+            for m in by_exact.get(q_name, ())
+            if m.name == q_name and m.discriminator == q_disc and m not in exact_matches
+        ]
     if exact_matches:
         return exact_matches, partial_matches
 
     # 4. Case-insensitive exact match
-    for member in guild.members:
-        if (
-            query_lower == member.name.lower()
-            or (member.nick and query_lower == member.nick.lower())
-        ):
-            exact_matches.append(member)
-
+    exact_matches = list(by_lower.get(query_lower, ()))
     if exact_matches:
         return exact_matches, partial_matches
 
-    # 5. Partial matches
-    for member in guild.members:
-        if (
-            query_lower in member.name.lower()
-            or (member.nick and query_lower in member.nick.lower())
-        ):
-            partial_matches.append(member)
+    # 5. Partial matches (names were lowercased when the index was built)
+    partial_matches = [
+        member
+        for name_lower, nick_lower, member in lowered
+        if query_lower in name_lower or (nick_lower and query_lower in nick_lower)
+    ]
+
+    # 6. Fuzzy fallback for typos: best-scoring nickname/username, ready for the dropdown
+    if not partial_matches and query_lower:
+        choices, owners, by_bigram = _guild_fuzzy_index(guild, lowered)
+
+        # Prefilter: only names sharing a character bigram with the query get scored
+        query_bigrams = _bigrams(query_lower)
+        if query_bigrams:
+            candidates = sorted(
+                set().union(*(by_bigram.get(gram, ()) for gram in query_bigrams))
+            )
+        else:
+            candidates = range(len(choices))
+
+        scorer = fuzz.token_set_ratio if " " in query_lower else fuzz.WRatio
+        close = process.extract(
+            query_lower,
+            [choices[i] for i in candidates],
+            scorer=scorer,
+            limit=SELECT_OPTION_LIMIT * 2,
+            score_cutoff=RESOLVE_FUZZY_CUTOFF,
+        )
+        # List choices return (name, score, index); a member can match on both names
+        partial_matches = list(
+            dict.fromkeys(owners[candidates[index]] for _, _, index in close)
+        )
+        del partial_matches[SELECT_OPTION_LIMIT:]
 
     return exact_matches, partial_matches
 
 
+# Discord rejects selects with more options than this
+SELECT_OPTION_LIMIT = 25
+
+NO_NICKNAME_LABEL = "No nickname"
+
+
+def _option_for(m: discord.Member) -> discord.SelectOption:
+    """Build a user dropdown option; migrated accounts (discriminator "0") drop the #0."""
+    label = m.name if m.discriminator == "0" else f"{m.name}#{m.discriminator}"
+    return discord.SelectOption(
+        label=label,
+        description=(m.nick or NO_NICKNAME_LABEL),
+        value=str(m.id),
+    )
+
+
 # ------------------------------------------------------------
 # Dropdown for Create CMI
 # ------------------------------------------------------------
 class UserSelectDropdown(discord.ui.Select):
     def __init__(self, matches):
-        options = [
-            discord.SelectOption(
-                label=f"{m.name}#{m.discriminator}",
-                description=(m.nick or "No nickname"),
-                value=str(m.id),
-            )
-            for m in matches
-        ]
+        options = [_option_for(m) for m in matches[:SELECT_OPTION_LIMIT]]
 
         super().__init__(
             placeholder="Select a user",
@@ -1538,14 +2276,7 @@ class UserSelectDropdownView(discord.ui.View):
 # ------------------------------------------------------------
 class UserSelectDropdownForManage(discord.ui.Select):
     def __init__(self, matches):
-        options = [
-            discord.SelectOption(
-                label=f"{m.name}#{m.discriminator}",
-                description=(m.nick or "No nickname"),
-                value=str(m.id),
-            )
-            for m in matches
-        ]
+        options = [_option_for(m) for m in matches[:SELECT_OPTION_LIMIT]]
 
         super().__init__(
             placeholder="Select a user",
@@ -1627,27 +2358,38 @@ class CreateCMIModal(discord.ui.Modal):
         self.add_item(self.reason)
 
     async def on_submit(self, interaction: discord.Interaction):
+        # Acknowledge first: parsing, the DB write and role/nickname edits can exceed 3s
+        if not interaction.response.is_done():
+            await interaction.response.defer(ephemeral=True)
+
         cog: "CMI" = interaction.client.get_cog("CMI")
         if not cog:
-            return await interaction.response.send_message(
+            return await interaction.followup.send(
                 "❌ CMI system is not available.",
                 ephemeral=True,
             )
 
         try:
             await cog.handle_create_from_modal(interaction, self)
-        except Exception:
+        except Exception as e:
             logging.exception("Error handling CreateCMIModal submission")
-            tb = traceback.format_exc()
             try:
-                await interaction.response.send_message(
-                    "❌ Something went wrong while creating the CMI.",
-                    ephemeral=True,
-                )
+                if interaction.response.is_done():
+                    await interaction.followup.send(
+                        "❌ Something went wrong while creating the CMI.",
+                        ephemeral=True,
+                    )
+                else:
+                    await interaction.response.send_message(
+                        "❌ Something went wrong while creating the CMI.",
+                        ephemeral=True,
+                    )
             except Exception:
                 pass
             try:
                 if interaction.followup:
+                    # Formatted only once we can send it; the innermost 10 frames are the useful ones
+                    tb = "".join(traceback.format_exception(type(e), e, e.__traceback__, limit=-10))
                     await interaction.followup.send(f"```{tb[:1800]}```", ephemeral=True)
             except Exception:
                 pass
@@ -1668,6 +2410,8 @@ class SelectUserForCMIModal(discord.ui.Modal):
         self.add_item(self.user_field)
 
     async def on_submit(self, interaction: discord.Interaction):
+        await interaction.response.defer(ephemeral=True)
+
         query = self.user_field.value.strip()
         guild = interaction.guild
 
@@ -1675,53 +2419,54 @@ class SelectUserForCMIModal(discord.ui.Modal):
 
         # No matches
         if not exact_matches and not partial_matches:
-            return await interaction.response.send_message(
+            return await interaction.followup.send(
                 "❌ No matches — try a different name or ID.",
                 ephemeral=True,
             )
 
         # Exact match → open Create CMI modal (via button to avoid modal-in-modal)
         if exact_matches:
-            target_user = exact_matches[0]
-
-            class _TempButton(discord.ui.View):
-                def __init__(self, target):
-                    super().__init__(timeout=10)
-                    self.target = target
-
-                    button = discord.ui.Button(
-                        label="Open CMI Form",
-                        style=discord.ButtonStyle.primary,
-                    )
-                    button.callback = self.open_modal
-                    self.add_item(button)
-
-                async def open_modal(self, button_interaction: discord.Interaction):
-                    modal = CreateCMIModal(target_user=self.target)
-                    await button_interaction.response.send_modal(modal)
-
-            return await interaction.response.send_message(
+            return await interaction.followup.send(
                 "Opening CMI creation…",
-                view=_TempButton(target_user),
+                view=CreateCMIBounceView(exact_matches[0]),
                 ephemeral=True,
             )
 
         # Partial matches → dropdown
-        if 1 <= len(partial_matches) <= 25:
+        if 1 <= len(partial_matches) <= SELECT_OPTION_LIMIT:
             view = UserSelectDropdownView(partial_matches)
-            return await interaction.response.send_message(
+            return await interaction.followup.send(
                 "Multiple users match your search. Please select one:",
                 view=view,
                 ephemeral=True,
             )
 
         # Too many matches
-        return await interaction.response.send_message(
+        return await interaction.followup.send(
             f"❌ Too many matches ({len(partial_matches)}). Please be more specific.",
             ephemeral=True,
         )
 
 
+class CreateCMIBounceView(discord.ui.View):
+    """One button that opens CreateCMIModal (a modal can't be sent from a modal submit)."""
+
+    def __init__(self, target: discord.Member):
+        super().__init__(timeout=10)
+        self.target = target
+
+        button = discord.ui.Button(
+            label="Open CMI Form",
+            style=discord.ButtonStyle.primary,
+        )
+        button.callback = self.open_modal
+        self.add_item(button)
+
+    async def open_modal(self, button_interaction: discord.Interaction):
+        modal = CreateCMIModal(target_user=self.target)
+        await button_interaction.response.send_modal(modal)
+
+
 # ------------------------------------------------------------
 # Modal: Select user for "Manage CMIs for Others"
 # ------------------------------------------------------------
@@ -1763,7 +2508,7 @@ class SelectUserForManageCMIModal(discord.ui.Modal):
             return await cog.show_manage_cmi_ui(interaction, target_member=target_user)
 
         # Partial matches → dropdown
-        if 1 <= len(partial_matches) <= 25:
+        if 1 <= len(partial_matches) <= SELECT_OPTION_LIMIT:
             view = UserSelectDropdownViewForManage(partial_matches)
             return await interaction.followup.send(
                 "Multiple users match your search. Please select one:",
@@ -1791,7 +2536,8 @@ class SetUserTimezoneModal(discord.ui.Modal, title="Set My Timezone"):
 
     async def on_submit(self, interaction: discord.Interaction):
         tz_text = self.timezone.value.strip()
-        iana = normalize_timezone_input(tz_text)
+        # A first-seen IANA name reads tzdata from disk; keep that off the event loop
+        iana = await asyncio.to_thread(normalize_timezone_input, tz_text)
 
         if not iana:
             return await interaction.response.send_message(
@@ -1803,7 +2549,7 @@ class SetUserTimezoneModal(discord.ui.Modal, title="Set My Timezone"):
                 ephemeral=True,
             )
 
-        set_user_timezone(interaction.guild.id, interaction.user.id, iana)
+        await set_user_timezone(interaction.guild.id, interaction.user.id, iana)
 
         await interaction.response.send_message(
             f"✅ Your timezone has been set to **{iana}**",
@@ -1836,7 +2582,8 @@ class SetServerTimezoneModal(discord.ui.Modal, title="Set Server Timezone"):
             )
 
         tz_text = self.timezone.value.strip()
-        iana = normalize_timezone_input(tz_text)
+        # A first-seen IANA name reads tzdata from disk; keep that off the event loop
+        iana = await asyncio.to_thread(normalize_timezone_input, tz_text)
 
         if not iana:
             return await interaction.response.send_message(
@@ -1848,7 +2595,7 @@ class SetServerTimezoneModal(discord.ui.Modal, title="Set Server Timezone"):
                 ephemeral=True,
             )
 
-        set_server_timezone_text(interaction.guild.id, iana)
+        await set_server_timezone_text(interaction.guild.id, iana)
 
         await interaction.response.send_message(
             f"✅ Server timezone updated to **{iana}**",
@@ -1859,6 +2606,9 @@ class SetServerTimezoneModal(discord.ui.Modal, title="Set Server Timezone"):
 # ------------------------------------------------------------
 # Modal: Broadcast Message (Owner Only)
 # ------------------------------------------------------------
+# Per-guild cap on a broadcast send so one slow channel can't hold up the summary
+BROADCAST_SEND_TIMEOUT = 10
+
 class BroadcastModal(discord.ui.Modal, title="📢 Broadcast to All Servers"):
     message = discord.ui.TextInput(
         label="Message",
@@ -1886,53 +2636,72 @@ class BroadcastModal(discord.ui.Modal, title="📢 Broadcast to All Servers"):
             title="📢 Bot Announcement",
             description=message_text,
             color=discord.Color.gold(),
-            timestamp=datetime.now(timezone.utc)
+            timestamp=discord.utils.utcnow()
         )
         # No footer - message only from bot
         
-        # Track success/failure
-        success_count = 0
-        fail_count = 0
-        guilds_list = []
-        
-        # Send to all guilds
-        for guild in bot.guilds:
+        # Resolve every guild's CMI channel up front in a few IN (...) queries
+        guilds = bot.guilds
+        guild_ids = [guild.id for guild in guilds]
+        channel_map: dict[int, int] = {}
+        for i in range(0, len(guild_ids), SQLITE_IN_CHUNK):
+            chunk = guild_ids[i:i + SQLITE_IN_CHUNK]
+            rows = await db_fetchall(
+                f"""
+                SELECT guild_id, cmi_channel_id FROM guild_channels
+                WHERE guild_id IN ({",".join("?" * len(chunk))})
+                  AND cmi_channel_id IS NOT NULL
+                """,
+                tuple(chunk),
+            )
+            channel_map.update((row["guild_id"], row["cmi_channel_id"]) for row in rows)
+
+        async def _send_one(guild: discord.Guild) -> tuple[bool, str]:
             try:
                 # Get the CMI channel for this guild
-                conn = get_db_connection()
-                cur = conn.cursor()
-                cur.execute(
-                    "SELECT cmi_channel_id FROM guild_channels WHERE guild_id = ?",
-                    (guild.id,)
-                )
-                row = cur.fetchone()
-                conn.close()
-                
+                cmi_channel_id = channel_map.get(guild.id)
+
                 # Determine target channel
                 target_channel = None
-                if row and row["cmi_channel_id"]:
-                    target_channel = guild.get_channel(row["cmi_channel_id"])
-                
+                if cmi_channel_id:
+                    target_channel = guild.get_channel(cmi_channel_id)
+
                 # Fallback to first text channel if no CMI channel set
                 if not target_channel:
-                    target_channel = next(
-                        (ch for ch in guild.text_channels if ch.permissions_for(guild.me).send_messages),
-                        None
-                    )
-                
-                if target_channel:
-                    await target_channel.send(embed=embed)
-                    success_count += 1
-                    guilds_list.append(f"✅ {guild.name}")
-                else:
-                    fail_count += 1
-                    guilds_list.append(f"❌ {guild.name} (no accessible channel)")
-                    
+                    target_channel = find_fallback_channel(guild)
+
+                if not target_channel:
+                    return False, f"❌ {guild.name} (no accessible channel)"
+
+                await asyncio.wait_for(
+                    target_channel.send(embed=embed), timeout=BROADCAST_SEND_TIMEOUT
+                )
+                return True, f"✅ {guild.name}"
+
             except Exception as e:
+                logging.error(f"Failed to broadcast to {guild.name}: {e!r}")
+                return False, f"❌ {guild.name} ({(str(e) or type(e).__name__)[:30]})"
+
+        # Send to all guilds concurrently; total time is the slowest send, not the sum
+        results = await asyncio.gather(
+            *(_send_one(guild) for guild in guilds), return_exceptions=True
+        )
+
+        # Track success/failure
+        success_count = 0
+        fail_count = 0
+        guilds_list = []
+        for guild, result in zip(guilds, results):
+            if isinstance(result, BaseException):
+                ok, label = False, f"❌ {guild.name} ({type(result).__name__})"
+            else:
+                ok, label = result
+            if ok:
+                success_count += 1
+            else:
                 fail_count += 1
-                guilds_list.append(f"❌ {guild.name} ({str(e)[:30]})")
-                logging.error(f"Failed to broadcast to {guild.name}: {e}")
-        
+            guilds_list.append(label)
+
         # Send summary to user
         summary_embed = discord.Embed(
             title="📊 Broadcast Summary",
@@ -1941,7 +2710,7 @@ class BroadcastModal(discord.ui.Modal, title="📢 Broadcast to All Servers"):
         )
         summary_embed.add_field(
             name="Statistics",
-            value=f"✅ Success: {success_count}\n❌ Failed: {fail_count}\n📊 Total: {len(bot.guilds)}",
+            value=f"✅ Success: {success_count}\n❌ Failed: {fail_count}\n📊 Total: {len(guilds)}",
             inline=False
         )
         
@@ -1967,23 +2736,23 @@ class BroadcastSummaryView(discord.ui.View):
         
         # Discord embed field has 1024 char limit, description has 4096 limit
         if len(guilds_text) > 4000:
-            # Split into multiple messages
+            # Split into multiple messages at the last newline before 3900 chars
+            # (leave some buffer); a single over-long line is cut hard
             chunks = []
-            current_chunk = []
-            current_length = 0
-            
-            for guild_line in self.guilds_list:
-                if current_length + len(guild_line) + 1 > 3900:  # Leave some buffer
-                    chunks.append("\n".join(current_chunk))
-                    current_chunk = [guild_line]
-                    current_length = len(guild_line)
+            start = 0
+            while start < len(guilds_text):
+                end = start + 3900
+                if end >= len(guilds_text):
+                    chunks.append(guilds_text[start:])
+                    break
+                cut = guilds_text.rfind("\n", start, end + 1)
+                if cut <= start:
+                    chunks.append(guilds_text[start:end])
+                    start = end
                 else:
-                    current_chunk.append(guild_line)
-                    current_length += len(guild_line) + 1
-            
-            if current_chunk:
-                chunks.append("\n".join(current_chunk))
-            
+                    chunks.append(guilds_text[start:cut])
+                    start = cut + 1
+
             # Send first chunk as response
             embed = discord.Embed(
                 title="📋 Server List (Part 1)",
@@ -2030,7 +2799,7 @@ class SetNicknamePrefixModal(discord.ui.Modal, title="Set CMI Nickname Prefix"):
                 ephemeral=True,
             )
 
-        set_nickname_prefix(interaction.guild.id, new_prefix)
+        await set_nickname_prefix(interaction.guild.id, new_prefix)
 
         await interaction.response.send_message(
             f"Nickname prefix updated to: **{new_prefix}**",
@@ -2041,6 +2810,14 @@ class SetNicknamePrefixModal(discord.ui.Modal, title="Set CMI Nickname Prefix"):
 # ------------------------------------------------------------
 # Modal: Daily CMI Report Settings
 # ------------------------------------------------------------
+# "8:00 (8 AM)" etc. for each report hour, built once
+_HOUR_LABELS = tuple(f"{h}:00 ({h % 12 or 12} {'AM' if h < 12 else 'PM'})" for h in range(24))
+
+# Accepted answers for the "Enabled" field
+_TRUE_WORDS = frozenset({"yes", "y", "true", "1", "on"})
+_FALSE_WORDS = frozenset({"no", "n", "false", "0", "off"})
+
+
 class DailyReportSettingsModal(discord.ui.Modal):
     def __init__(self, guild_id: int):
         super().__init__(title="Daily CMI Report Settings")
@@ -2084,15 +2861,15 @@ class DailyReportSettingsModal(discord.ui.Modal):
             )
 
         # Load current settings
-        current_enabled, current_channel_id, current_hour = get_daily_report_settings(self.guild_id)
+        current_enabled, current_channel_id, current_hour = await get_daily_report_settings(self.guild_id)
         
         # Parse enabled (optional - keep current if not provided)
         enabled = current_enabled
         if self.enabled.value and self.enabled.value.strip():
             enabled_text = self.enabled.value.strip().lower()
-            if enabled_text in ["yes", "y", "true", "1", "on"]:
+            if enabled_text in _TRUE_WORDS:
                 enabled = True
-            elif enabled_text in ["no", "n", "false", "0", "off"]:
+            elif enabled_text in _FALSE_WORDS:
                 enabled = False
             else:
                 return await interaction.response.send_message(
@@ -2119,16 +2896,8 @@ class DailyReportSettingsModal(discord.ui.Modal):
         if self.channel.value and self.channel.value.strip():
             text = self.channel.value.strip()
             
-            channel = None
-            if text.isdigit():
-                channel = interaction.guild.get_channel(int(text))
+            channel = find_text_channel(interaction.guild, text)
             if not channel:
-                for ch in interaction.guild.text_channels:
-                    if ch.name == text:
-                        channel = ch
-                        break
-
-            if not channel or not isinstance(channel, discord.TextChannel):
                 return await interaction.response.send_message(
                     "❌ I couldn't find a text channel with that ID or exact name.",
                     ephemeral=True,
@@ -2137,17 +2906,15 @@ class DailyReportSettingsModal(discord.ui.Modal):
             channel_id = channel.id
 
         # Save settings
-        set_daily_report_settings(interaction.guild.id, enabled, channel_id, report_hour)
+        await set_daily_report_settings(interaction.guild.id, enabled, channel_id, report_hour)
 
         # Build response with current values
         status = "enabled" if enabled else "disabled"
-        hour_12 = report_hour % 12 or 12
-        am_pm = "AM" if report_hour < 12 else "PM"
-        
+
         response_lines = [
             f"✅ Daily CMI Report settings updated:",
             f"**Status:** {status.capitalize()}",
-            f"**Report Hour:** {report_hour}:00 ({hour_12} {am_pm}) in server timezone",
+            f"**Report Hour:** {_HOUR_LABELS[report_hour]} in server timezone",
         ]
         
         if channel_id:
@@ -2200,7 +2967,7 @@ class SetAwayRoleModal(discord.ui.Modal, title="Set Away Role"):
                 ephemeral=True,
             )
 
-        set_away_role_id(interaction.guild.id, role.id)
+        await set_away_role_id(interaction.guild.id, role.id)
 
         await interaction.response.send_message(
             f"✅ Away role set to {role.mention}.\n"
@@ -2234,22 +3001,14 @@ class SetCMIChannelModal(discord.ui.Modal, title="Set CMI Channel"):
 
         text = self.channel_id_or_name.value.strip()
 
-        channel = None
-        if text.isdigit():
-            channel = interaction.guild.get_channel(int(text))
+        channel = find_text_channel(interaction.guild, text)
         if not channel:
-            for ch in interaction.guild.text_channels:
-                if ch.name == text:
-                    channel = ch
-                    break
-
-        if not channel or not isinstance(channel, discord.TextChannel):
             return await interaction.response.send_message(
                 "❌ I couldn't find a text channel with that ID or exact name.",
                 ephemeral=True,
             )
 
-        set_cmi_channel_id(interaction.guild.id, channel.id)
+        await set_cmi_channel_id(interaction.guild.id, channel.id)
 
         await interaction.response.send_message(
             f"✅ CMI commands are now restricted to {channel.mention}.",
@@ -2261,6 +3020,41 @@ class SetCMIChannelModal(discord.ui.Modal, title="Set CMI Channel"):
 # Section 8 — Per‑CMI UI Components (Edit, Cancel, Return Early)
 # ============================================================
 
+# ------------------------------------------------------------
+# Display names for confirmation messages
+# ------------------------------------------------------------
+# (guild_id, user_id) -> (last display name seen, expires_at), for members not in the cache
+DISPLAY_NAME_TTL = 30 * 60
+_display_names: dict[tuple[int, int], tuple[str, float]] = {}
+
+
+def member_display_name(guild: discord.Guild | None, user_id: int) -> str:
+    """Display name of a guild member, falling back to a recent one or 'User <id>'."""
+    if guild is None:
+        return f"User {user_id}"
+
+    key = (guild.id, user_id)
+    member = guild.get_member(user_id)  # dict lookup on discord.py's member cache
+    if member is not None:
+        name = member.display_name
+        _display_names[key] = (name, monotonic() + DISPLAY_NAME_TTL)
+        return name
+
+    cached = _display_names.get(key)
+    if cached and cached[1] > monotonic():
+        return cached[0]
+    _display_names.pop(key, None)
+    return f"User {user_id}"
+
+
+# ------------------------------------------------------------
+# Modal input helper
+# ------------------------------------------------------------
+def _v(text_input: discord.ui.TextInput) -> str:
+    """Stripped value of a modal text input ('' when left empty)."""
+    return (text_input.value or "").strip()
+
+
 # ------------------------------------------------------------
 # Modal: Edit an existing CMI
 # ------------------------------------------------------------
@@ -2327,20 +3121,16 @@ class CMIEditModal(discord.ui.Modal):
 
     async def on_submit(self, interaction: discord.Interaction):
         # Fetch existing CMI
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute(
+        row = await db_fetchone(
             """
-            SELECT id, user_id, guild_id, leave_dt, return_dt, reason, timezone_label
+            SELECT id, user_id, guild_id, leave_ts, return_ts, reason, timezone_label
             FROM cmi_entries
             WHERE guild_id = ? AND id = ?
             """,
             (self.guild_id, self.cmi_id),
         )
-        row = cur.fetchone()
 
         if not row:
-            conn.close()
             return await interaction.response.send_message(
                 "❌ This CMI no longer exists.", ephemeral=True
             )
@@ -2348,42 +3138,39 @@ class CMIEditModal(discord.ui.Modal):
         cmi_owner_id = row["user_id"]
 
         # Permission check
-        user_is_leadership = await is_leadership(interaction)
-        if interaction.user.id != cmi_owner_id and not user_is_leadership:
-            conn.close()
+        # Checked owner-first so owners skip the leadership lookup
+        if interaction.user.id != cmi_owner_id and not await is_leadership(interaction):
             return await interaction.response.send_message(
                 "❌ You can only edit your own CMIs. Leadership can edit any.",
                 ephemeral=True,
             )
 
-        # Parse old values
-        try:
-            old_leave_dt = datetime.fromisoformat(row["leave_dt"])
-        except Exception:
-            conn.close()
+        if row["leave_ts"] is None:
             return await interaction.response.send_message(
                 "❌ The existing CMI has corrupted data and cannot be edited.",
                 ephemeral=True,
             )
 
-        try:
-            old_return_dt = (
-                datetime.fromisoformat(row["return_dt"])
-                if row["return_dt"]
-                else None
-            )
-        except Exception:
-            old_return_dt = None
+        # Resolve timezone
+        effective_tz, _ = await resolve_effective_timezone(
+            self.guild_id,
+            cmi_owner_id,
+            None,
+        )
+        tz_info = get_zone(effective_tz)
+
+        # Old values from the stored epoch seconds, in the owner's timezone
+        old_leave_dt = from_epoch(row["leave_ts"], tz_info)
+        old_return_dt = from_epoch(row["return_ts"], tz_info)
 
         old_reason = row["reason"]
         old_tz_label = row["timezone_label"] or ""
 
         # Read modal inputs
-        leave_date_input = self.leave_date.value.strip() if self.leave_date.value else ""
-        leave_time_input = self.leave_time.value.strip() if self.leave_time.value else ""
-        return_date_input = self.return_date.value.strip() if self.return_date.value else ""
-        return_time_input = self.return_time.value.strip() if self.return_time.value else ""
-        reason_input = self.reason.value.strip() if self.reason.value else ""
+        leave_date_input, leave_time_input, return_date_input, return_time_input, reason_input = map(
+            _v,
+            (self.leave_date, self.leave_time, self.return_date, self.return_time, self.reason),
+        )
 
         # Check if user is intentionally clearing leave (both fields empty = start now)
         clearing_leave = (not leave_date_input and not leave_time_input)
@@ -2391,28 +3178,17 @@ class CMIEditModal(discord.ui.Modal):
         # Check if user is intentionally clearing return (both fields empty = open-ended)
         clearing_return = (not return_date_input and not return_time_input)
 
-        changing_dates = any([
-            leave_date_input,
-            leave_time_input,
-            return_date_input,
-            return_time_input,
-            clearing_leave,
-            clearing_return,
-        ])
+        changing_dates = (
+            bool(leave_date_input or leave_time_input or return_date_input or return_time_input)
+            or clearing_leave
+            or clearing_return
+        )
         
         # Track if individual fields were explicitly cleared (for single field edits)
         # If a field has empty string but the other field has content, treat empty as "use default"
         clear_leave_time_only = (leave_date_input and not leave_time_input)
         clear_return_time_only = (return_date_input and not return_time_input)
 
-        # Resolve timezone
-        effective_tz, _ = resolve_effective_timezone(
-            self.guild_id,
-            cmi_owner_id,
-            None,
-        )
-        tz_info = ZoneInfo(effective_tz)
-
         leave_dt = old_leave_dt
         return_dt = old_return_dt
 
@@ -2433,7 +3209,6 @@ class CMIEditModal(discord.ui.Modal):
                 if leave_date_input:
                     parsed_ld = parse_date(leave_date_input, tz_info)
                     if not parsed_ld:
-                        conn.close()
                         return await interaction.response.send_message(
                             "❌ I couldn't understand your new leave date.",
                             ephemeral=True,
@@ -2447,7 +3222,6 @@ class CMIEditModal(discord.ui.Modal):
                 if leave_time_input:
                     parsed_lt = parse_time(leave_time_input)
                     if not parsed_lt:
-                        conn.close()
                         return await interaction.response.send_message(
                             "❌ I couldn't understand your new leave time.",
                             ephemeral=True,
@@ -2473,7 +3247,6 @@ class CMIEditModal(discord.ui.Modal):
                 if return_date_input:
                     parsed_rd = parse_date(return_date_input, tz_info)
                     if not parsed_rd:
-                        conn.close()
                         return await interaction.response.send_message(
                             "❌ I couldn't understand your new return date.",
                             ephemeral=True,
@@ -2487,7 +3260,6 @@ class CMIEditModal(discord.ui.Modal):
                 if return_time_input:
                     parsed_rt = parse_time(return_time_input)
                     if not parsed_rt:
-                        conn.close()
                         return await interaction.response.send_message(
                             "❌ I couldn't understand your new return time.",
                             ephemeral=True,
@@ -2505,92 +3277,112 @@ class CMIEditModal(discord.ui.Modal):
         # Keep existing timezone label
         tz_label = old_tz_label or f"Server Timezone: {effective_tz}"
 
-        # Overlap detection
-        has_overlap, conflict = await has_overlapping_cmi(
-            self.guild_id,
-            cmi_owner_id,
-            leave_dt,
-            return_dt,
-            exclude_id=self.cmi_id,
-        )
-
-        if has_overlap:
-            conflict_leave_str = conflict["leave_dt"].astimezone(tz_info).strftime(
-                "%d/%m/%Y %H:%M"
-            )
-            if conflict["return_dt"]:
-                conflict_return_str = conflict["return_dt"].astimezone(
-                    tz_info
-                ).strftime("%d/%m/%Y %H:%M")
-                conflict_range = f"{conflict_leave_str} → {conflict_return_str}"
-            else:
-                conflict_range = f"{conflict_leave_str} → Until further notice"
-
-            conflict_reason = (
-                f"Reason: {conflict['reason']}"
-                if conflict["reason"]
-                else "No reason provided."
-            )
+        # Final reason
+        new_reason = reason_input if reason_input != "" else old_reason
 
-            conn.close()
+        # Modal resubmitted as-is: nothing to write, overlap-check or recompute
+        if (
+            new_reason == old_reason
+            and same_minute(leave_dt, old_leave_dt)
+            and same_minute(return_dt, old_return_dt)
+        ):
             return await interaction.response.send_message(
-                "❌ This edited CMI would overlap with an existing one.\n"
-                f"Existing CMI (ID {conflict['id']}): {conflict_range}\n"
-                f"{conflict_reason}",
-                ephemeral=True,
+                "ℹ No changes made.", ephemeral=True
             )
 
-        # Final reason
-        new_reason = reason_input if reason_input != "" else old_reason
-
         logging.info(
             f"Edit CMI #{self.cmi_id}: About to save - leave_dt={leave_dt.isoformat()}, return_dt={return_dt.isoformat() if return_dt else None}, reason={new_reason!r}"
         )
 
-        # Update DB
-        cur.execute(
+        # Update DB unless the new window overlaps another of the owner's CMIs
+        # (same test as has_overlapping_cmi, so the common case is one statement).
+        # RETURNING reports what was stored without a second SELECT.
+        new_leave_ts = int(leave_dt.timestamp())
+        new_return_ts = int(return_dt.timestamp()) if return_dt else None
+        now_ts = int(datetime.now(UTC).timestamp())
+        saved_row = await db_execute_returning(
             """
             UPDATE cmi_entries
-            SET leave_dt = ?, return_dt = ?, reason = ?, timezone_label = ?
+            SET leave_dt = ?, return_dt = ?, leave_ts = ?, return_ts = ?, reason = ?, timezone_label = ?
             WHERE guild_id = ? AND id = ?
+            AND NOT EXISTS (
+                SELECT 1 FROM cmi_entries AS other
+                WHERE other.guild_id = ? AND other.user_id = ? AND other.id <> ?
+                AND (other.return_ts IS NULL OR other.return_ts >= ?)
+                AND (? IS NULL OR other.leave_ts <= ?)
+            )
+            RETURNING leave_dt, return_dt, reason
             """,
             (
                 leave_dt.isoformat(),
                 return_dt.isoformat() if return_dt else None,
+                new_leave_ts,
+                new_return_ts,
                 new_reason,
                 tz_label,
                 self.guild_id,
                 self.cmi_id,
+                self.guild_id,
+                cmi_owner_id,
+                self.cmi_id,
+                max(now_ts, new_leave_ts),
+                new_return_ts,
+                new_return_ts,
             ),
         )
-        conn.commit()
-        
-        # Verify the update actually happened
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT leave_dt, return_dt, reason FROM cmi_entries WHERE guild_id = ? AND id = ?",
-            (self.guild_id, self.cmi_id)
-        )
-        verify_row = cur.fetchone()
-        if verify_row:
-            logging.info(
-                f"Edit CMI #{self.cmi_id}: Verified in DB - leave_dt={verify_row['leave_dt']}, return_dt={verify_row['return_dt']}, reason={verify_row['reason']!r}"
+
+        if saved_row is None:
+            # Nothing updated: look up the conflicting CMI for the message (cold path)
+            has_overlap, conflict = await has_overlapping_cmi(
+                self.guild_id,
+                cmi_owner_id,
+                leave_dt,
+                return_dt,
+                exclude_id=self.cmi_id,
+            )
+
+            if has_overlap:
+                conflict_leave_str = fmt_dmyhm(conflict["leave_dt"].astimezone(tz_info))
+                if conflict["return_dt"]:
+                    conflict_return_str = fmt_dmyhm(conflict["return_dt"].astimezone(tz_info))
+                    conflict_range = f"{conflict_leave_str} → {conflict_return_str}"
+                else:
+                    conflict_range = f"{conflict_leave_str} → Until further notice"
+
+                conflict_reason = (
+                    f"Reason: {conflict['reason']}"
+                    if conflict["reason"]
+                    else "No reason provided."
+                )
+
+                return await interaction.response.send_message(
+                    "❌ This edited CMI would overlap with an existing one.\n"
+                    f"Existing CMI (ID {conflict['id']}): {conflict_range}\n"
+                    f"{conflict_reason}",
+                    ephemeral=True,
+                )
+
+            return await interaction.response.send_message(
+                "❌ This CMI no longer exists.", ephemeral=True
+            )
+
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(
+                f"Edit CMI #{self.cmi_id}: Saved in DB - leave_dt={saved_row['leave_dt']}, return_dt={saved_row['return_dt']}, reason={saved_row['reason']!r}"
             )
-        conn.close()
 
         # Recompute away role
         if interaction.guild:
-            await recompute_away_role_for_user(interaction.guild, cmi_owner_id)
+            schedule_away_recompute(interaction.guild, cmi_owner_id)
 
         # Build confirmation message with user name and new CMI details
-        member = interaction.guild.get_member(cmi_owner_id)
-        user_name = member.display_name if member else f"User {cmi_owner_id}"
+        user_name = member_display_name(interaction.guild, cmi_owner_id)
         
-        leave_str = leave_dt.astimezone(tz_info).strftime("%d/%m/%Y %H:%M")
+        leave_str = fmt_dmyhm(leave_dt.astimezone(tz_info))
         leave_ts = to_discord_timestamp(leave_dt)
         
         if return_dt:
-            return_str = return_dt.astimezone(tz_info).strftime("%d/%m/%Y %H:%M")
+            return_str = fmt_dmyhm(return_dt.astimezone(tz_info))
             return_ts = to_discord_timestamp(return_dt)
             time_range = f"{leave_ts} → {return_ts}"
         else:
@@ -2618,62 +3410,34 @@ class CMIConfirmCancelView(discord.ui.View):
 
     @discord.ui.button(label="Yes, cancel", style=discord.ButtonStyle.danger)
     async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user_is_leadership = await is_leadership(interaction)
-        if interaction.user.id != self.owner_id and not user_is_leadership:
+        if interaction.user.id != self.owner_id and not await is_leadership(interaction):
             return await interaction.response.send_message(
                 "❌ You can only cancel your own CMIs. Leadership can cancel any.",
                 ephemeral=True,
             )
 
-        # Fetch CMI details before deleting
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT leave_dt, return_dt, reason, timezone_label FROM cmi_entries WHERE guild_id = ? AND id = ?",
+        # Delete and read back the details in one statement
+        row = await db_execute_returning(
+            "DELETE FROM cmi_entries WHERE guild_id = ? AND id = ? RETURNING leave_ts, return_ts, reason",
             (self.guild_id, self.cmi_id),
         )
-        row = cur.fetchone()
-        
+
         if not row:
-            conn.close()
             return await interaction.response.send_message(
                 "❌ CMI not found.",
                 ephemeral=True,
             )
-        
-        # Parse CMI details
-        try:
-            leave_dt = datetime.fromisoformat(row["leave_dt"])
-        except Exception:
-            leave_dt = None
-        
-        try:
-            return_dt = datetime.fromisoformat(row["return_dt"]) if row["return_dt"] else None
-        except Exception:
-            return_dt = None
-        
-        tz_label = row["timezone_label"] or "No timezone specified"
+
+        # CMI details (only rendered as Discord timestamps, so UTC is fine)
+        leave_dt = from_epoch(row["leave_ts"])
+        return_dt = from_epoch(row["return_ts"])
         reason = row["reason"]
-        
-        # Get server timezone for display
-        server_tz_name = get_server_timezone_text(self.guild_id)
-        server_tz_iana = normalize_timezone_input(server_tz_name) or DEFAULT_SERVER_TZ
-        server_tz = ZoneInfo(server_tz_iana)
-        
-        # Delete the CMI
-        cur.execute(
-            "DELETE FROM cmi_entries WHERE guild_id = ? and id = ?",
-            (self.guild_id, self.cmi_id),
-        )
-        conn.commit()
-        conn.close()
 
         if interaction.guild:
-            await recompute_away_role_for_user(interaction.guild, self.owner_id)
+            schedule_away_recompute(interaction.guild, self.owner_id)
 
         # Get user's display name
-        member = interaction.guild.get_member(self.owner_id)
-        user_name = member.display_name if member else f"User {self.owner_id}"
+        user_name = member_display_name(interaction.guild, self.owner_id)
         
         # Format cancelled CMI with strikethrough
         if leave_dt:
@@ -2720,26 +3484,21 @@ class CMIEntryView(discord.ui.View):
 
     @discord.ui.button(label="Edit", style=discord.ButtonStyle.primary)
     async def edit_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user_is_leadership = await is_leadership(interaction)
-        if interaction.user.id != self.owner_id and not user_is_leadership:
+        if interaction.user.id != self.owner_id and not await is_leadership(interaction):
             return await interaction.response.send_message(
                 "❌ You can only edit your own CMIs. Leadership can edit any.",
                 ephemeral=True,
             )
 
         # Fetch CMI
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute(
+        row = await db_fetchone(
             """
-            SELECT id, user_id, guild_id, leave_dt, return_dt, reason, timezone_label
+            SELECT id, user_id, guild_id, leave_ts, return_ts, reason, timezone_label
             FROM cmi_entries
             WHERE guild_id = ? AND id = ?
             """,
             (self.guild_id, self.cmi_id),
         )
-        row = cur.fetchone()
-        conn.close()
 
         if not row:
             return await interaction.response.send_message(
@@ -2747,19 +3506,11 @@ class CMIEntryView(discord.ui.View):
                 ephemeral=True,
             )
 
-        try:
-            leave_dt = datetime.fromisoformat(row["leave_dt"])
-        except Exception:
-            leave_dt = None
-
-        try:
-            return_dt = (
-                datetime.fromisoformat(row["return_dt"])
-                if row["return_dt"]
-                else None
-            )
-        except Exception:
-            return_dt = None
+        # Prefill in the owner's timezone, the same one the modal parses input in
+        effective_tz, _ = await resolve_effective_timezone(self.guild_id, self.owner_id, None)
+        tz_info = get_zone(effective_tz)
+        leave_dt = from_epoch(row["leave_ts"], tz_info)
+        return_dt = from_epoch(row["return_ts"], tz_info)
 
         modal = CMIEditModal(
             cmi_id=self.cmi_id,
@@ -2774,8 +3525,7 @@ class CMIEntryView(discord.ui.View):
 
     @discord.ui.button(label="Cancel CMI", style=discord.ButtonStyle.danger)
     async def cancel_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user_is_leadership = await is_leadership(interaction)
-        if interaction.user.id != self.owner_id and not user_is_leadership:
+        if interaction.user.id != self.owner_id and not await is_leadership(interaction):
             return await interaction.response.send_message(
                 "❌ You can only cancel your own CMIs. Leadership can cancel any.",
                 ephemeral=True,
@@ -2794,8 +3544,7 @@ class CMIEntryView(discord.ui.View):
 
     @discord.ui.button(label="Return early", style=discord.ButtonStyle.success)
     async def return_early_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        user_is_leadership = await is_leadership(interaction)
-        if interaction.user.id != self.owner_id and not user_is_leadership:
+        if interaction.user.id != self.owner_id and not await is_leadership(interaction):
             return await interaction.response.send_message(
                 "❌ You can only return early from your own CMIs. Leadership can modify any.",
                 ephemeral=True,
@@ -2811,24 +3560,19 @@ class CMIEntryView(discord.ui.View):
         guild_id = guild.id
 
         # Server timezone
-        server_tz_name = get_server_timezone_text(guild_id)
-        server_tz_iana = normalize_timezone_input(server_tz_name) or DEFAULT_SERVER_TZ
-        server_tz = ZoneInfo(server_tz_iana)
+        server_tz_name = await get_server_timezone_text(guild_id)
+        server_tz_iana, server_tz = server_zone(server_tz_name)
         now = datetime.now(server_tz)
 
         # Fetch CMI
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute(
+        row = await db_fetchone(
             """
-            SELECT leave_dt, return_dt
+            SELECT leave_ts, return_ts
             FROM cmi_entries
             WHERE guild_id = ? AND id = ? AND user_id = ?
             """,
             (guild_id, self.cmi_id, self.owner_id),
         )
-        row = cur.fetchone()
-        conn.close()
 
         if not row:
             return await interaction.response.send_message(
@@ -2836,27 +3580,15 @@ class CMIEntryView(discord.ui.View):
                 ephemeral=True,
             )
 
-        try:
-            leave_dt = datetime.fromisoformat(row["leave_dt"])
-        except Exception:
+        leave_ts, return_ts = row["leave_ts"], row["return_ts"]
+        if leave_ts is None:
             return await interaction.response.send_message(
                 "❌ This CMI has corrupted data and cannot be updated.",
                 ephemeral=True,
             )
 
-        try:
-            return_dt = (
-                datetime.fromisoformat(row["return_dt"])
-                if row["return_dt"]
-                else None
-            )
-        except Exception:
-            return_dt = None
-
-        leave_local = leave_dt.astimezone(server_tz)
-        return_local = return_dt.astimezone(server_tz) if return_dt else None
-
-        active = leave_local <= now and (return_local is None or return_local >= now)
+        now_ts = int(now.timestamp())
+        active = leave_ts <= now_ts and (return_ts is None or return_ts >= now_ts)
 
         if not active:
             return await interaction.response.send_message(
@@ -2867,231 +3599,42 @@ class CMIEntryView(discord.ui.View):
         # Set return_dt to now
         new_return_dt = now
 
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute(
+        await db_execute(
             """
             UPDATE cmi_entries
-            SET return_dt = ?
+            SET return_dt = ?, return_ts = ?
             WHERE guild_id = ? AND id = ?
             """,
-            (new_return_dt.isoformat(), guild_id, self.cmi_id),
+            (new_return_dt.isoformat(), int(new_return_dt.timestamp()), guild_id, self.cmi_id),
         )
-        conn.commit()
-        conn.close()
 
-        await recompute_away_role_for_user(guild, self.owner_id)
+        schedule_away_recompute(guild, self.owner_id)
 
         # Get user's display name
-        member = guild.get_member(self.owner_id)
-        user_name = member.display_name if member else f"User {self.owner_id}"
+        user_name = member_display_name(guild, self.owner_id)
 
         await interaction.response.send_message(
             f"✅ You have returned early from your current CMI. Welcome back **{user_name}**!",
             ephemeral=False,
         )
 # ============================================================
-# Section 9 — Main Menu Views (MainCMIMenuView & LeadershipToolsView)
+# Section 10 — UI Classes (Final Menus + User Selection)
 # ============================================================
 
 # ------------------------------------------------------------
-# Main CMI Menu View
+# Support Embed
 # ------------------------------------------------------------
-class MainCMIMenuView(discord.ui.View):
-    def __init__(self, guild_id: int, user_id: int, is_leadership: bool):
-        super().__init__(timeout=None)
-        self.guild_id = guild_id
-        self.user_id = user_id
-        self.is_leadership = is_leadership
-
-        # Leadership-only button
-        if is_leadership:
-            self.add_item(self.LeadershipToolsButton())
-
-    # -------------------------
-    # Create CMI
-    # -------------------------
-    @discord.ui.button(label="Create CMI", style=discord.ButtonStyle.primary)
-    async def create_cmi(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if not await enforce_cmi_channel(interaction):
-            return
-
-        modal = CreateCMIModal(target_user=None)
-        await interaction.response.send_modal(modal)
-
-    # -------------------------
-    # Manage My CMIs
-    # -------------------------
-    @discord.ui.button(label="Manage My CMIs", style=discord.ButtonStyle.secondary)
-    async def manage_my_cmis(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if not await enforce_cmi_channel(interaction):
-            return
-
-        cog: "CMI" = interaction.client.get_cog("CMI")
-        if not cog:
-            return await interaction.response.send_message(
-                "❌ CMI system is not available.",
-                ephemeral=True,
-            )
-
-        await interaction.response.defer(ephemeral=True)
-        await cog.show_manage_cmi_ui(interaction, target_member=interaction.user)
-
-    # -------------------------
-    # List CMIs
-    # -------------------------
-    @discord.ui.button(label="List CMIs", style=discord.ButtonStyle.success)
-    async def list_cmis(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if not await enforce_cmi_channel(interaction):
-            return
-
-        cog: "CMI" = interaction.client.get_cog("CMI")
-        if not cog:
-            return await interaction.response.send_message(
-                "❌ CMI system is not available.",
-                ephemeral=True,
-            )
-
-        await interaction.response.defer(ephemeral=True)
-        await cog.show_list(interaction)
-
-    # -------------------------
-    # My History
-    # -------------------------
-    @discord.ui.button(label="My History", style=discord.ButtonStyle.secondary)
-    async def my_history(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if not await enforce_cmi_channel(interaction):
-            return
-
-        cog: "CMI" = interaction.client.get_cog("CMI")
-        if not cog:
-            return await interaction.response.send_message(
-                "❌ CMI system is not available.",
-                ephemeral=True,
-            )
-
-        await interaction.response.defer(ephemeral=True)
-        await cog.show_my_history(interaction)
-
-    # -------------------------
-    # Set My Timezone
-    # -------------------------
-    @discord.ui.button(label="Set My Timezone", style=discord.ButtonStyle.primary)
-    async def set_my_timezone(self, interaction: discord.Interaction, button: discord.ui.Button):
-        modal = SetUserTimezoneModal()
-        await interaction.response.send_modal(modal)
-
-    # -------------------------
-    # Leadership Tools Button
-    # -------------------------
-    class LeadershipToolsButton(discord.ui.Button):
-        def __init__(self):
-            super().__init__(
-                label="Leadership Tools",
-                style=discord.ButtonStyle.danger,
-            )
-
-        async def callback(self, interaction: discord.Interaction):
-            if not await is_leadership(interaction):
-                return await interaction.response.send_message(
-                    "❌ You are not leadership.",
-                    ephemeral=True,
-                )
-
-            embed = build_leadership_tools_embed()
-            view = LeadershipToolsView(
-                guild_id=interaction.guild.id,
-                user_id=interaction.user.id,
-            )
-
-            await interaction.response.send_message(
-                embed=embed,
-                view=view,
-                ephemeral=True,
-            )
-
-
-# ------------------------------------------------------------
-# Leadership Tools View
-# ------------------------------------------------------------
-class LeadershipToolsView(discord.ui.View):
-    def __init__(self, guild_id: int, user_id: int):
-        super().__init__(timeout=None)
-        self.guild_id = guild_id
-        self.user_id = user_id
-
-    # -------------------------
-    # Set Server Timezone
-    # -------------------------
-    @discord.ui.button(label="Set Server Timezone", style=discord.ButtonStyle.primary)
-    async def set_server_timezone(self, interaction: discord.Interaction, button: discord.ui.Button):
-        modal = SetServerTimezoneModal()
-        await interaction.response.send_modal(modal)
-
-    # -------------------------
-    # Set Away Role
-    # -------------------------
-    @discord.ui.button(label="Set Away Role", style=discord.ButtonStyle.primary)
-    async def set_away_role(self, interaction: discord.Interaction, button: discord.ui.Button):
-        modal = SetAwayRoleModal()
-        await interaction.response.send_modal(modal)
-
-    # -------------------------
-    # Set CMI Channel
-    # -------------------------
-    @discord.ui.button(label="Set CMI Channel", style=discord.ButtonStyle.primary)
-    async def set_cmi_channel(self, interaction: discord.Interaction, button: discord.ui.Button):
-        modal = SetCMIChannelModal()
-        await interaction.response.send_modal(modal)
-
-    # -------------------------
-    # Manage CMIs for Others
-    # -------------------------
-    @discord.ui.button(label="Manage CMIs for Others", style=discord.ButtonStyle.secondary)
-    async def manage_for_others(self, interaction: discord.Interaction, button: discord.ui.Button):
-        modal = SelectUserForManageCMIModal()
-        await interaction.response.send_modal(modal)
-
-    # -------------------------
-    # View Previous CMIs
-    # -------------------------
-    @discord.ui.button(label="View Previous CMIs", style=discord.ButtonStyle.secondary)
-    async def view_previous(self, interaction: discord.Interaction, button: discord.ui.Button):
-        cog: "CMI" = interaction.client.get_cog("CMI")
-        if not cog:
-            return await interaction.response.send_message(
-                "❌ CMI system is not available.",
-                ephemeral=True,
-            )
-
-        await interaction.response.defer(ephemeral=True)
-        await cog.show_previous_cmis(interaction)
-
-    # -------------------------
-    # Set Nickname Prefix
-    # -------------------------
-    @discord.ui.button(label="Set Nickname Prefix", style=discord.ButtonStyle.danger, custom_id="cmi_set_nick_prefix")
-    async def set_prefix(self, interaction: discord.Interaction, button: discord.ui.Button):
-        # This button is handled by on_interaction
-        pass
-# ============================================================
-# Section 10 — UI Classes (Final Menus + User Selection)
-# ============================================================
-
-# ------------------------------------------------------------
-# Support Embed
-# ------------------------------------------------------------
-def build_support_embed():
-    embed = discord.Embed(
-        title="💛 Support the Bot",
-        description=(
-            "Tips help my work (and myself) keep going.\n"
-            "They are not required but are appreciated.\n\n"
-            "[ko-fi.com/savxo](https://ko-fi.com/savxo)"
-        ),
-        color=discord.Color.gold(),
-    )
-    return embed
+def build_support_embed():
+    embed = discord.Embed(
+        title="💛 Support the Bot",
+        description=(
+            "Tips help my work (and myself) keep going.\n"
+            "They are not required but are appreciated.\n\n"
+            "[ko-fi.com/savxo](https://ko-fi.com/savxo)"
+        ),
+        color=discord.Color.gold(),
+    )
+    return embed
 
 
 # ------------------------------------------------------------
@@ -3473,14 +4016,14 @@ class MemberDropdown(discord.ui.Select):
 
         options: list[discord.SelectOption] = []
 
-        members = [
-            m
-            for m in guild.members
-            if not m.bot
-        ]
-        members.sort(key=lambda m: (m.display_name or m.name).lower())
+        # Only the first 25 alphabetically are shown; a bounded heap avoids sorting everyone
+        members = heapq.nsmallest(
+            SELECT_OPTION_LIMIT,
+            (m for m in guild.members if not m.bot),
+            key=lambda m: (m.display_name or m.name).lower(),
+        )
 
-        for member in members[:25]:
+        for member in members:
             label = f"{member.display_name} — {member.name}"
             options.append(
                 discord.SelectOption(
@@ -3701,7 +4244,7 @@ class MainCMIMenuView(discord.ui.View):
     @discord.ui.button(label="Check Server Timezone", style=discord.ButtonStyle.secondary)
     async def check_server_timezone(self, interaction: discord.Interaction, button: discord.ui.Button):
         guild_id = interaction.guild.id
-        tz = get_server_timezone_text(guild_id)
+        tz = await get_server_timezone_text(guild_id)
         await interaction.response.send_message(
             f"🌐 **Server Timezone:** `{tz}`",
             ephemeral=True,
@@ -3750,6 +4293,19 @@ class LeadershipToolsView(discord.ui.View):
         self.guild_id = guild_id
         self.user_id = user_id
 
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """
+        Check leadership when a button is clicked, so settings modals only open
+        for users who can submit them. The modals still re-check on submit.
+        """
+        if await is_leadership(interaction):
+            return True
+        await interaction.response.send_message(
+            "❌ Only leadership can use these tools.",
+            ephemeral=True,
+        )
+        return False
+
     # 1. Return to Main Menu
     @discord.ui.button(label="Return to Main Menu", style=discord.ButtonStyle.secondary)
     async def return_main(self, interaction: discord.Interaction, button: discord.ui.Button):
@@ -3876,7 +4432,7 @@ class LeadershipToolsView(discord.ui.View):
         await interaction.response.defer(ephemeral=True)
         
         # Check if reports are enabled
-        enabled, channel_id, report_hour = get_daily_report_settings(self.guild_id)
+        enabled, channel_id, report_hour = await get_daily_report_settings(self.guild_id)
         
         if not enabled:
             return await interaction.followup.send(
@@ -3888,7 +4444,7 @@ class LeadershipToolsView(discord.ui.View):
         if channel_id:
             channel = interaction.guild.get_channel(channel_id)
         else:
-            channel_id_from_settings = get_cmi_channel_id(self.guild_id)
+            channel_id_from_settings = await get_cmi_channel_id(self.guild_id)
             channel = interaction.guild.get_channel(channel_id_from_settings) if channel_id_from_settings else None
 
         if not channel:
@@ -3898,9 +4454,8 @@ class LeadershipToolsView(discord.ui.View):
             )
 
         # Get server timezone
-        server_tz_name = get_server_timezone_text(self.guild_id)
-        server_tz_iana = normalize_timezone_input(server_tz_name) or DEFAULT_SERVER_TZ
-        server_tz = ZoneInfo(server_tz_iana)
+        server_tz_name = await get_server_timezone_text(self.guild_id)
+        server_tz_iana, server_tz = server_zone(server_tz_name)
         
         # Generate and send report
         try:
@@ -3978,8 +4533,8 @@ class CMI(commands.Cog):
 
         return _TempButton(target_member, perms=for_perms)
 
-    def _format_perm_roles(self, guild: discord.Guild) -> str:
-        role_ids = get_bot_perm_roles(guild.id)
+    async def _format_perm_roles(self, guild: discord.Guild) -> str:
+        role_ids = await get_bot_perm_roles(guild.id)
         if not role_ids:
             return "(none)"
         parts = []
@@ -3988,8 +4543,8 @@ class CMI(commands.Cog):
             parts.append(role.mention if role else f"<@&{rid}>")
         return ", ".join(parts)
 
-    def _format_perm_users(self, guild: discord.Guild) -> str:
-        user_ids = get_bot_perm_users(guild.id)
+    async def _format_perm_users(self, guild: discord.Guild) -> str:
+        user_ids = await get_bot_perm_users(guild.id)
         if not user_ids:
             return "(none)"
         parts = []
@@ -3998,11 +4553,50 @@ class CMI(commands.Cog):
             parts.append(member.mention if member else f"<@{uid}>")
         return ", ".join(parts)
 
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel):
+        _channel_name_cache.pop(channel.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(
+        self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel
+    ):
+        # Position changes matter too: the first channel wins a duplicate name
+        if before.name != after.name or before.position != after.position:
+            _channel_name_cache.pop(after.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        # A deleted channel may have been the cached fallback
+        _fallback_channel_cache.pop(channel.guild.id, None)
+        _channel_name_cache.pop(channel.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        invalidate_guild_name_index(member.guild.id)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if before.nick != after.nick:
+            invalidate_guild_name_index(after.guild.id)
+
+    @commands.Cog.listener()
+    async def on_user_update(self, before: discord.User, after: discord.User):
+        # Usernames are global, so every guild's index may be affected
+        if (
+            before.name != after.name
+            or before.discriminator != after.discriminator
+            or before.global_name != after.global_name
+        ):
+            invalidate_guild_name_index()
+
     @commands.Cog.listener()
     async def on_member_remove(self, member: discord.Member):
+        invalidate_guild_name_index(member.guild.id)
+
         # Auto-clean user-specific bot perms when a member leaves
         try:
-            remove_bot_perm_user(member.guild.id, member.id)
+            await remove_bot_perm_user(member.guild.id, member.id)
         except Exception:
             logging.exception("Failed to prune bot perm user on member remove")
 
@@ -4015,12 +4609,11 @@ class CMI(commands.Cog):
         modal: CreateCMIModal,
     ):
         if not interaction.guild:
-            return await interaction.response.send_message(
-                "❌ This can only be used in a server.",
-                ephemeral=True,
-            )
+            return await self._safe_send(interaction, "❌ This can only be used in a server.")
 
-        await interaction.response.defer(ephemeral=True)
+        # CreateCMIModal normally defers before calling in
+        if not interaction.response.is_done():
+            await interaction.response.defer(ephemeral=True)
 
         # Enforce channel restriction
         if not await enforce_cmi_channel(interaction):
@@ -4028,10 +4621,9 @@ class CMI(commands.Cog):
 
         target = modal.target_user or interaction.user
 
-        leave_date = modal.leave_date.value.strip() if modal.leave_date.value else ""
-        leave_time = modal.leave_time.value.strip() if modal.leave_time.value else ""
-        return_date = modal.return_date.value.strip() if modal.return_date.value else ""
-        return_time = modal.return_time.value.strip() if modal.return_time.value else ""
+        leave_date, leave_time, return_date, return_time = map(
+            _v, (modal.leave_date, modal.leave_time, modal.return_date, modal.return_time)
+        )
         reason = modal.reason.value or None
         tz_override = None
 
@@ -4042,12 +4634,12 @@ class CMI(commands.Cog):
         clearing_return = (not return_date and not return_time)
 
         # Resolve effective timezone
-        effective_tz, tz_source = resolve_effective_timezone(
+        effective_tz, tz_source = await resolve_effective_timezone(
             interaction.guild.id,
             target.id,
             tz_override,
         )
-        tz_info = ZoneInfo(effective_tz)
+        tz_info = get_zone(effective_tz)
         
         # Handle leave date/time
         if clearing_leave:
@@ -4120,22 +4712,60 @@ class CMI(commands.Cog):
             else:
                 return_dt = None
 
-        # Overlap detection
-        has_overlap, conflict = await has_overlapping_cmi(
-            interaction.guild.id,
-            target.id,
-            leave_dt,
-            return_dt,
-        )
+        # Timezone label
+        if tz_source == "override":
+            tz_label = f"Overridden Timezone: {effective_tz}"
+        elif tz_source == "user":
+            tz_label = f"User Timezone: {effective_tz}"
+        else:
+            tz_label = f"Server Timezone: {effective_tz}"
 
-        if has_overlap:
-            conflict_leave_str = conflict["leave_dt"].astimezone(tz_info).strftime(
-                "%d/%m/%Y %H:%M"
+        # Insert into DB
+        # Determine who created this CMI
+        # If target_user exists (leadership creating for someone), use interaction.user.id
+        # Otherwise, user is creating for themselves
+        created_by_id = interaction.user.id if modal.target_user else target.id
+        
+        # Overlap detection is enforced by the cmi_no_overlap trigger; the
+        # conflicting entry is only looked up when the insert is rejected.
+        try:
+            cur = await db_execute(
+                """
+                INSERT INTO cmi_entries (
+                    guild_id, user_id, leave_dt, return_dt, leave_ts, return_ts,
+                    reason, timezone_label, created_at, created_by_user_id
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    interaction.guild.id,
+                    target.id,
+                    leave_dt.isoformat(),
+                    return_dt.isoformat() if return_dt else None,
+                    int(leave_dt.timestamp()),
+                    int(return_dt.timestamp()) if return_dt else None,
+                    reason,
+                    tz_label,
+                    datetime.utcnow().isoformat(),
+                    created_by_id,
+                ),
+            )
+        except sqlite3.IntegrityError:
+            has_overlap, conflict = await has_overlapping_cmi(
+                interaction.guild.id,
+                target.id,
+                leave_dt,
+                return_dt,
             )
+            if not has_overlap:
+                return await interaction.followup.send(
+                    "❌ This CMI overlaps with an existing one.",
+                    ephemeral=True,
+                )
+
+            conflict_leave_str = fmt_dmyhm(conflict["leave_dt"].astimezone(tz_info))
             if conflict["return_dt"]:
-                conflict_return_str = conflict["return_dt"].astimezone(
-                    tz_info
-                ).strftime("%d/%m/%Y %H:%M")
+                conflict_return_str = fmt_dmyhm(conflict["return_dt"].astimezone(tz_info))
                 conflict_range = f"{conflict_leave_str} → {conflict_return_str}"
             else:
                 conflict_range = f"{conflict_leave_str} → Until further notice"
@@ -4152,58 +4782,19 @@ class CMI(commands.Cog):
                 f"{conflict_reason}",
                 ephemeral=True,
             )
-
-        # Timezone label
-        if tz_source == "override":
-            tz_label = f"Overridden Timezone: {effective_tz}"
-        elif tz_source == "user":
-            tz_label = f"User Timezone: {effective_tz}"
-        else:
-            tz_label = f"Server Timezone: {effective_tz}"
-
-        # Insert into DB
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        # Determine who created this CMI
-        # If target_user exists (leadership creating for someone), use interaction.user.id
-        # Otherwise, user is creating for themselves
-        created_by_id = interaction.user.id if modal.target_user else target.id
-        
-        cur.execute(
-            """
-            INSERT INTO cmi_entries (
-                guild_id, user_id, leave_dt, return_dt, reason,
-                timezone_label, created_at, created_by_user_id
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                interaction.guild.id,
-                target.id,
-                leave_dt.isoformat(),
-                return_dt.isoformat() if return_dt else None,
-                reason,
-                tz_label,
-                datetime.utcnow().isoformat(),
-                created_by_id,
-            ),
-        )
         entry_id = cur.lastrowid
-        conn.commit()
-        conn.close()
 
         # Recompute away role
         await recompute_away_role_for_user(interaction.guild, target.id)
 
         # Build response
         local_leave = leave_dt.astimezone(tz_info)
-        leave_str = local_leave.strftime("%d/%m/%Y %H:%M")
+        leave_str = fmt_dmyhm(local_leave)
         leave_ts = to_discord_timestamp(leave_dt)
 
         if return_dt:
             local_return = return_dt.astimezone(tz_info)
-            return_str = local_return.strftime("%d/%m/%Y %H:%M")
+            return_str = fmt_dmyhm(local_return)
             return_ts = to_discord_timestamp(return_dt)
         else:
             return_str = None
@@ -4226,7 +4817,7 @@ class CMI(commands.Cog):
             lines.append(f"**Reason:** {reason}")
 
         # Add countdown information
-        now = datetime.now(timezone.utc)
+        now = datetime.now(UTC)
         if leave_dt > now:
             # Future CMI - show time until start
             delta = leave_dt - now
@@ -4275,40 +4866,6 @@ class CMI(commands.Cog):
     # Leadership selection helpers (Create/Manage/Perms guided flow)
     # --------------------------------------------------------
 
-    async def start_create_cmi_for_others(self, interaction: discord.Interaction):
-        """Leadership → Create CMI for Others → open selector."""
-        await interaction.response.defer(ephemeral=True)
-
-        view = UserSelectionView(
-            guild=interaction.guild,
-            purpose="create_cmi_for_others",
-            requester_id=interaction.user.id,
-        )
-
-        await interaction.followup.send(
-            "👤 **Select a member to create a CMI for.**\n"
-            "Use the dropdown or search by name.",
-            view=view,
-            ephemeral=True,
-        )
-
-    async def start_manage_cmi_for_others(self, interaction: discord.Interaction):
-        """Leadership → Manage CMI for Others → open selector."""
-        await interaction.response.defer(ephemeral=True)
-
-        view = UserSelectionView(
-            guild=interaction.guild,
-            purpose="manage_cmi_for_others",
-            requester_id=interaction.user.id,
-        )
-
-        await interaction.followup.send(
-            "👤 **Select a member to manage their CMIs.**\n"
-            "Use the dropdown or search by name.",
-            view=view,
-            ephemeral=True,
-        )
-
     async def start_manage_bot_perms(self, interaction: discord.Interaction):
         """Leadership → Manage Bot Perms → show roles/users menu."""
         embed = discord.Embed(
@@ -4364,7 +4921,7 @@ class CMI(commands.Cog):
         )
         embed.add_field(
             name="Permitted Roles",
-            value=self._format_perm_roles(guild),
+            value=await self._format_perm_roles(guild),
             inline=False,
         )
         embed.set_footer(text="Members with Administrator/Manage Server always have access.")
@@ -4384,8 +4941,8 @@ class CMI(commands.Cog):
         )
 
         # Get all members with custom permissions
-        manual_user_ids = set(get_bot_perm_users(guild.id))
-        perm_role_ids = set(get_bot_perm_roles(guild.id))
+        manual_user_ids = set(await get_bot_perm_users(guild.id))
+        perm_role_ids = set(await get_bot_perm_roles(guild.id))
 
         # Build a list of members with custom permissions
         members_with_perms = {}
@@ -4478,7 +5035,7 @@ class CMI(commands.Cog):
                 ephemeral=True,
             )
 
-        add_bot_perm_role(guild.id, role.id)
+        await add_bot_perm_role(guild.id, role.id)
         await interaction.followup.send(
             f"✅ Added bot leadership permissions for {role.mention}.",
             ephemeral=True,
@@ -4520,7 +5077,7 @@ class CMI(commands.Cog):
                 ephemeral=True,
             )
 
-        remove_bot_perm_role(guild.id, role.id)
+        await remove_bot_perm_role(guild.id, role.id)
         await interaction.followup.send(
             f"✅ Removed bot leadership permissions from {role.mention}.",
             ephemeral=True,
@@ -4533,397 +5090,72 @@ class CMI(commands.Cog):
         guild = interaction.guild
         query = user_query.strip()
 
-        # Try to find member using existing helper
-        member = await self.prompt_for_member(interaction, query)
-        if not member:
-            return  # prompt_for_member already sent error
-
-        if member.guild_permissions.administrator:
-            return await interaction.followup.send(
-                f"{member.mention} already has bot access via Administrator.",
-                ephemeral=True,
-            )
-
-        add_bot_perm_user(guild.id, member.id)
-        await interaction.followup.send(
-            f"✅ Granted bot leadership permissions to {member.mention}.",
-            ephemeral=True,
-        )
-
-    async def handle_remove_user_perm(self, interaction: discord.Interaction, user_query: str):
-        """Remove a user from bot permissions from modal input."""
-        await interaction.response.defer(ephemeral=True)
-
-        guild = interaction.guild
-        query = user_query.strip()
-
-        # Try to find member using existing helper
-        member = await self.prompt_for_member(interaction, query)
-        if not member:
-            return  # prompt_for_member already sent error
-
-        if member.guild_permissions.administrator:
-            return await interaction.followup.send(
-                f"{member.mention} has bot access via Administrator and cannot be removed.",
-                ephemeral=True,
-            )
-
-        # Check if user is manually added
-        manual_user_ids = set(get_bot_perm_users(guild.id))
-        if member.id not in manual_user_ids:
-            # Check if they have perms via role
-            perm_role_ids = set(get_bot_perm_roles(guild.id))
-            member_role_ids = {r.id for r in member.roles}
-            matching_roles = member_role_ids & perm_role_ids
-            
-            if matching_roles:
-                role_names = []
-                for role_id in matching_roles:
-                    role = guild.get_role(role_id)
-                    if role:
-                        role_names.append(role.name)
-                return await interaction.followup.send(
-                    f"❌ Unable to remove {member.mention}'s permissions.\n"
-                    f"This user has permissions through the following role(s): **{', '.join(role_names)}**.\n"
-                    f"Please remove the role or edit role permissions instead.",
-                    ephemeral=True,
-                )
-            else:
-                return await interaction.followup.send(
-                    f"❌ {member.mention} does not have manually added bot permissions.",
-                    ephemeral=True,
-                )
-
-        remove_bot_perm_user(guild.id, member.id)
-        await interaction.followup.send(
-            f"✅ Removed bot leadership permissions from {member.mention}.",
-            ephemeral=True,
-        )
-
-    # --------------------------------------------------------
-    # Callbacks for selection flow
-    # --------------------------------------------------------
-
-    async def handle_member_selected(
-        self,
-        interaction: discord.Interaction,
-        member: discord.Member,
-        purpose: str,
-    ):
-        """Called when a member is chosen from the dropdown."""
-
-        # If the interaction has already been responded to (e.g., we deferred a modal
-        # submit), we cannot send another modal directly. Fall back to a button that
-        # opens the modal on a fresh component interaction.
-        def _make_continue_view(target_member):
-            class _TempButton(discord.ui.View):
-                def __init__(self, target):
-                    super().__init__(timeout=15)
-                    self.target = target
-
-                    button = discord.ui.Button(
-                        label="Open CMI Form",
-                        style=discord.ButtonStyle.primary,
-                    )
-                    button.callback = self.open_modal
-                    self.add_item(button)
-
-                async def open_modal(self, button_interaction: discord.Interaction):
-                    try:
-                        modal = CreateCMIModal(target_user=self.target)
-                        await button_interaction.response.send_modal(modal)
-                    except Exception:
-                        logging.exception("Failed to open CreateCMIModal from TempButton")
-                        try:
-                            await button_interaction.response.send_message(
-                                "❌ Something went wrong opening the creation modal.",
-                                ephemeral=True,
-                            )
-                        except Exception:
-                            logging.exception("Failed to send error followup in TempButton.open_modal")
-
-            return _TempButton(target_member)
-
-        if purpose == "create_cmi_for_others":
-            modal = CreateCMIModal(target_user=member)
-
-            if interaction.response.is_done() or interaction.type == discord.InteractionType.modal_submit:
-                try:
-                    return await interaction.response.send_message(
-                        "Opening CMI creation…",
-                        view=_make_continue_view(member),
-                        ephemeral=True,
-                    )
-                except discord.InteractionResponded:
-                    return await interaction.followup.send(
-                        "Opening CMI creation…",
-                        view=_make_continue_view(member),
-                        ephemeral=True,
-                    )
-
-            return await interaction.response.send_modal(modal)
-
-        if purpose == "manage_cmi_for_others":
-            await interaction.response.defer(ephemeral=True)
-            return await self.show_manage_cmi_ui(interaction, member)
-
-        if purpose == "manage_bot_perms":
-            # Same restriction applies for opening modals from modal submits
-            if interaction.type == discord.InteractionType.modal_submit:
-                class _PermsButton(discord.ui.View):
-                    def __init__(self, target):
-                        super().__init__(timeout=10)
-                        self.target = target
-
-                        button = discord.ui.Button(
-                            label="Open Perms Form",
-                            style=discord.ButtonStyle.primary,
-                        )
-                        button.callback = self.open_modal
-                        self.add_item(button)
-
-                    async def open_modal(self, button_interaction: discord.Interaction):
-                        try:
-                            modal = ManageBotPermsModal(target_member=self.target)
-                            await button_interaction.response.send_modal(modal)
-                        except Exception:
-                            logging.exception("Failed to open ManageBotPermsModal from TempButton")
-                            try:
-                                await button_interaction.response.send_message(
-                                    "❌ Something went wrong opening the perms modal.",
-                                    ephemeral=True,
-                                )
-                            except Exception:
-                                logging.exception("Failed to send error followup in _PermsButton.open_modal")
-
-                return await interaction.response.send_message(
-                    "Opening permissions modal…",
-                    view=_PermsButton(member),
-                    ephemeral=True,
-                )
-
-            modal = ManageBotPermsModal(target_member=member)
-            return await interaction.response.send_modal(modal)
-
-        return await interaction.response.send_message(
-            "❌ Unknown purpose.",
-            ephemeral=True,
-        )
-
-    async def handle_user_search_submission(
-        self,
-        interaction: discord.Interaction,
-        query: str,
-        purpose: str,
-    ):
-        """
-        Handles search modal submission → resolves member → routes.
-        IMPORTANT: We DO NOT defer here, because modals require an open response.
-        """
-
-        # Try to keep the interaction open, but if something already responded,
-        # fall back to followup.
-        member = await self.prompt_for_member(interaction, query)
-        if not member:
-            return  # prompt_for_member already sent the error
-
-        try:
-            return await self.handle_member_selected(interaction, member, purpose)
-        except discord.InteractionResponded:
-            # If the interaction is already responded (rare), send a continue button
-            # to open the modal on a fresh interaction.
-            if purpose == "create_cmi_for_others":
-                view = self._make_continue_view(member)
-                await interaction.followup.send(
-                    "Opening CMI creation…",
-                    view=view,
-                    ephemeral=True,
-                )
-            elif purpose == "manage_cmi_for_others":
-                # Show manage UI for the selected member
-                await self.show_manage_cmi_ui(interaction, target_member=member)
-            elif purpose == "manage_bot_perms":
-                view = self._make_continue_view(member)
-                await interaction.followup.send(
-                    "Opening permissions modal…",
-                    view=view,
-                    ephemeral=True,
-                )
-            else:
-                await interaction.followup.send(
-                    "❌ Could not complete selection.",
-                    ephemeral=True,
-                )
-
-    async def handle_member_selection_cancelled(
-        self,
-        interaction: discord.Interaction,
-        purpose: str,
-    ):
-        """Optional hook — currently unused but kept for consistency."""
-        return
-
-    # --------------------------------------------------------
-    # Matching helpers
-    # --------------------------------------------------------
-
-    async def _safe_send(self, interaction: discord.Interaction, message: str):
-        """Send ephemeral message safely depending on response state."""
-        if interaction.response.is_done():
-            await interaction.followup.send(message, ephemeral=True)
-        else:
-            await interaction.response.send_message(message, ephemeral=True)
-
-    async def prompt_for_member(
-        self,
-        interaction: discord.Interaction,
-        query: str,
-    ) -> discord.Member | None:
-        """
-        Resolve a member from:
-        - Exact name
-        - Partial name
-        - Nickname
-        - Username
-        - Display name
-        - ID
-        - Mention
-        - Fuzzy match fallback
-        """
-
-        guild = interaction.guild
-        if not guild:
-            await self._safe_send(interaction, "❌ This can only be used in a server.")
-            return None
-
-        raw = query.strip()
-        raw_lower = raw.lower()
-
-        # ----------------------------------------------------
-        # ID or mention
-        # ----------------------------------------------------
-        mention_match = re.match(r"<@!?(\d+)>", raw)
-
-        if raw.isdigit():
-            member = guild.get_member(int(raw))
-            if member:
-                return member
-
-        if mention_match:
-            member_id = int(mention_match.group(1))
-            member = guild.get_member(member_id)
-            if member:
-                return member
-
-        # ----------------------------------------------------
-        # Build searchable list
-        # ----------------------------------------------------
-        members = [m for m in guild.members if not m.bot]
-
-        def all_names(m: discord.Member):
-            return {
-                m.name.lower(),
-                (m.display_name or "").lower(),
-                (m.global_name or "").lower(),
-            }
-
-        # ----------------------------------------------------
-        # Exact match
-        # ----------------------------------------------------
-        exact_matches = [m for m in members if raw_lower in all_names(m)]
-
-        if len(exact_matches) == 1:
-            return exact_matches[0]
-
-        # ----------------------------------------------------
-        # Partial match
-        # ----------------------------------------------------
-        partial_matches = [
-            m for m in members
-            if raw_lower in m.name.lower()
-            or raw_lower in (m.display_name or "").lower()
-            or raw_lower in (m.global_name or "").lower()
-        ]
-
-        if len(partial_matches) == 1:
-            return partial_matches[0]
-
-        # ----------------------------------------------------
-        # Multi-match dropdown (1 < n ≤ 25)
-        # ----------------------------------------------------
-        if 1 < len(partial_matches) <= 25:
-
-            # Build dropdown
-            options = []
-            for m in sorted(
-                partial_matches,
-                key=lambda x: (x.display_name or x.name).lower(),
-            ):
-                label = f"{m.display_name} — {m.name}"
-                options.append(
-                    discord.SelectOption(
-                        label=label[:100],
-                        value=str(m.id),
-                    )
-                )
+        # Try to find member using existing helper
+        member = await self.prompt_for_member(interaction, query)
+        if not member:
+            return  # prompt_for_member already sent error
 
-            view = discord.ui.View(timeout=60)
-            select = discord.ui.Select(
-                placeholder="Multiple matches found — select one.",
-                min_values=1,
-                max_values=1,
-                options=options,
+        if member.guild_permissions.administrator:
+            return await interaction.followup.send(
+                f"{member.mention} already has bot access via Administrator.",
+                ephemeral=True,
             )
 
-            async def select_callback(inter: discord.Interaction):
-                if inter.user.id != interaction.user.id:
-                    return await inter.response.send_message(
-                        "❌ Only the original requester can use this.",
-                        ephemeral=True,
-                    )
-                await inter.response.defer(ephemeral=True)
-                view.stop()
+        await add_bot_perm_user(guild.id, member.id)
+        await interaction.followup.send(
+            f"✅ Granted bot leadership permissions to {member.mention}.",
+            ephemeral=True,
+        )
 
-            select.callback = select_callback
-            view.add_item(select)
+    async def handle_remove_user_perm(self, interaction: discord.Interaction, user_query: str):
+        """Remove a user from bot permissions from modal input."""
+        await interaction.response.defer(ephemeral=True)
 
-            # Send a followup view (interaction already deferred by caller)
-            await interaction.followup.send(
-                "Multiple members matched your search. Please choose one:",
-                view=view,
+        guild = interaction.guild
+        query = user_query.strip()
+
+        # Try to find member using existing helper
+        member = await self.prompt_for_member(interaction, query)
+        if not member:
+            return  # prompt_for_member already sent error
+
+        if member.guild_permissions.administrator:
+            return await interaction.followup.send(
+                f"{member.mention} has bot access via Administrator and cannot be removed.",
                 ephemeral=True,
             )
 
-            timeout = await view.wait()
-            if timeout:
-                await interaction.followup.send(
-                    "❌ Selection timed out.",
+        # Check if user is manually added
+        manual_user_ids = set(await get_bot_perm_users(guild.id))
+        if member.id not in manual_user_ids:
+            # Check if they have perms via role
+            perm_role_ids = set(await get_bot_perm_roles(guild.id))
+            member_role_ids = {r.id for r in member.roles}
+            matching_roles = member_role_ids & perm_role_ids
+            
+            if matching_roles:
+                role_names = []
+                for role_id in matching_roles:
+                    role = guild.get_role(role_id)
+                    if role:
+                        role_names.append(role.name)
+                return await interaction.followup.send(
+                    f"❌ Unable to remove {member.mention}'s permissions.\n"
+                    f"This user has permissions through the following role(s): **{', '.join(role_names)}**.\n"
+                    f"Please remove the role or edit role permissions instead.",
+                    ephemeral=True,
+                )
+            else:
+                return await interaction.followup.send(
+                    f"❌ {member.mention} does not have manually added bot permissions.",
                     ephemeral=True,
                 )
-                return None
-
-            chosen_id = int(select.values[0])
-            return guild.get_member(chosen_id)
-
-        # ----------------------------------------------------
-        # Fuzzy match fallback
-        # ----------------------------------------------------
-        name_map = {m.id: (m.display_name or m.name) for m in members}
-        close = get_close_matches(raw, name_map.values(), n=1, cutoff=0.6)
-
-        if close:
-            for mid, nm in name_map.items():
-                if nm == close[0]:
-                    return guild.get_member(mid)
 
-        # ----------------------------------------------------
-        # No matches
-        # ----------------------------------------------------
-        await self._safe_send(
-            interaction,
-            "❌ **No users found with this name, please try again.**",
+        await remove_bot_perm_user(guild.id, member.id)
+        await interaction.followup.send(
+            f"✅ Removed bot leadership permissions from {member.mention}.",
+            ephemeral=True,
         )
-        return None
 
     # --------------------------------------------------------
     # Manage CMIs (for self or others)
@@ -4943,54 +5175,27 @@ class CMI(commands.Cog):
             return
 
         guild_id = interaction.guild.id
-        user_is_leadership = await is_leadership(interaction)
-
-        if target_member.id != interaction.user.id and not user_is_leadership:
+        if target_member.id != interaction.user.id and not await is_leadership(interaction):
             return await interaction.followup.send(
                 "❌ Only leadership can manage CMIs for other members.",
                 ephemeral=True,
             )
 
-        # Fetch all CMIs for the user
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute(
+        server_tz_name = await get_server_timezone_text(guild_id)
+        server_tz_iana, server_tz = server_zone(server_tz_name)
+        now = datetime.now(server_tz)
+
+        # Active/future CMIs only: open-ended or return date not yet passed
+        rows = await db_fetchall(
             """
-            SELECT id, user_id, leave_dt, return_dt, reason, timezone_label
+            SELECT id, user_id, leave_ts, return_ts, reason, timezone_label
             FROM cmi_entries
             WHERE guild_id = ? AND user_id = ?
-            ORDER BY leave_dt ASC
+            AND (return_ts IS NULL OR return_ts >= ?)
+            ORDER BY leave_ts ASC
             """,
-            (guild_id, target_member.id),
+            (guild_id, target_member.id, int(now.timestamp())),
         )
-        all_rows = cur.fetchall()
-        conn.close()
-
-        # Filter to active/future CMIs (exclude past CMIs where return date has passed)
-        server_tz_name = get_server_timezone_text(guild_id)
-        server_tz_iana = normalize_timezone_input(server_tz_name) or DEFAULT_SERVER_TZ
-        server_tz = ZoneInfo(server_tz_iana)
-        now = datetime.now(server_tz)
-        rows = []
-        
-        for row in all_rows:
-            try:
-                return_dt = (
-                    datetime.fromisoformat(row["return_dt"])
-                    if row["return_dt"]
-                    else None
-                )
-            except Exception:
-                # If can't parse return date, include it (might be corrupted data)
-                rows.append(row)
-                continue
-            
-            # Exclude if return date is in the past (CMI has ended)
-            if return_dt is not None and return_dt < now:
-                continue
-            
-            # Include: open-ended (no return) OR future return date
-            rows.append(row)
 
         if not rows:
             if target_member.id == interaction.user.id:
@@ -5012,29 +5217,18 @@ class CMI(commands.Cog):
         views: list[CMIEntryView] = []
 
         for row in rows:
-            try:
-                leave_dt = datetime.fromisoformat(row["leave_dt"])
-            except Exception:
-                continue
-
-            try:
-                return_dt = (
-                    datetime.fromisoformat(row["return_dt"])
-                    if row["return_dt"]
-                    else None
-                )
-            except Exception:
-                return_dt = None
+            leave_dt = from_epoch(row["leave_ts"], server_tz)
+            return_dt = from_epoch(row["return_ts"], server_tz)
 
             tz_label = row["timezone_label"] or "No timezone specified"
 
             leave_local = leave_dt.astimezone(server_tz)
-            leave_str = leave_local.strftime("%d/%m/%Y %H:%M")
+            leave_str = fmt_dmyhm(leave_local)
             leave_ts = to_discord_timestamp(leave_dt)
 
             if return_dt:
                 return_local = return_dt.astimezone(server_tz)
-                return_str = return_local.strftime("%d/%m/%Y %H:%M")
+                return_str = fmt_dmyhm(return_local)
                 return_ts = to_discord_timestamp(return_dt)
             else:
                 return_str = "Until further notice"
@@ -5097,41 +5291,25 @@ class CMI(commands.Cog):
 
         guild_id = interaction.guild.id
 
-        server_tz_name = get_server_timezone_text(guild_id)
-        server_tz_iana = normalize_timezone_input(server_tz_name) or DEFAULT_SERVER_TZ
-        server_tz = ZoneInfo(server_tz_iana)
+        server_tz_name = await get_server_timezone_text(guild_id)
+        server_tz_iana, server_tz = server_zone(server_tz_name)
         now = datetime.now(server_tz)
 
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute(
+        rows = await db_fetchall(
             """
-            SELECT id, user_id, leave_dt, return_dt, reason, timezone_label
+            SELECT id, user_id, leave_ts, return_ts, reason, timezone_label
             FROM cmi_entries
             WHERE guild_id = ?
             """,
             (guild_id,),
         )
-        rows = cur.fetchall()
-        conn.close()
 
         currently_away = []
         upcoming = []
 
         for row in rows:
-            try:
-                leave_dt = datetime.fromisoformat(row["leave_dt"])
-            except Exception:
-                continue
-
-            try:
-                return_dt = (
-                    datetime.fromisoformat(row["return_dt"])
-                    if row["return_dt"]
-                    else None
-                )
-            except Exception:
-                return_dt = None
+            leave_dt = from_epoch(row["leave_ts"], server_tz)
+            return_dt = from_epoch(row["return_ts"], server_tz)
 
             leave_local = leave_dt.astimezone(server_tz)
             return_local = return_dt.astimezone(server_tz) if return_dt else None
@@ -5165,12 +5343,12 @@ class CMI(commands.Cog):
                 tz_label = row["timezone_label"] or "No timezone specified"
 
                 leave_local = leave_dt.astimezone(server_tz)
-                leave_str = leave_local.strftime("%d/%m/%Y %H:%M")
+                leave_str = fmt_dmyhm(leave_local)
                 leave_ts = to_discord_timestamp(leave_dt)
 
                 if return_dt:
                     return_local = return_dt.astimezone(server_tz)
-                    return_str = return_local.strftime("%d/%m/%Y %H:%M")
+                    return_str = fmt_dmyhm(return_local)
                     return_ts = to_discord_timestamp(return_dt)
                     
                     # Calculate time remaining
@@ -5215,7 +5393,7 @@ class CMI(commands.Cog):
                 tz_label = row["timezone_label"] or "No timezone specified"
 
                 leave_local = leave_dt.astimezone(server_tz)
-                leave_str = leave_local.strftime("%d/%m/%Y %H:%M")
+                leave_str = fmt_dmyhm(leave_local)
                 leave_ts = to_discord_timestamp(leave_dt)
 
                 days_until = (leave_local.date() - now.date()).days
@@ -5223,7 +5401,7 @@ class CMI(commands.Cog):
 
                 if return_dt:
                     return_local = return_dt.astimezone(server_tz)
-                    return_str = return_local.strftime("%d/%m/%Y %H:%M")
+                    return_str = fmt_dmyhm(return_local)
                     return_ts = to_discord_timestamp(return_dt)
                 else:
                     return_str = "Until further notice"
@@ -5264,40 +5442,24 @@ class CMI(commands.Cog):
             )
 
         guild_id = interaction.guild.id
-        server_tz_name = get_server_timezone_text(guild_id)
-        server_tz_iana = normalize_timezone_input(server_tz_name) or DEFAULT_SERVER_TZ
-        server_tz = ZoneInfo(server_tz_iana)
+        server_tz_name = await get_server_timezone_text(guild_id)
+        server_tz_iana, server_tz = server_zone(server_tz_name)
         now = datetime.now(server_tz)
 
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute(
+        rows = await db_fetchall(
             """
-            SELECT id, user_id, leave_dt, return_dt, reason, timezone_label
+            SELECT id, user_id, leave_ts, return_ts, reason, timezone_label
             FROM cmi_entries
             WHERE guild_id = ?
             """,
             (guild_id,),
         )
-        rows = cur.fetchall()
-        conn.close()
 
         past = []
 
         for row in rows:
-            try:
-                leave_dt = datetime.fromisoformat(row["leave_dt"])
-            except Exception:
-                continue
-
-            try:
-                return_dt = (
-                    datetime.fromisoformat(row["return_dt"])
-                    if row["return_dt"]
-                    else None
-                )
-            except Exception:
-                return_dt = None
+            leave_dt = from_epoch(row["leave_ts"], server_tz)
+            return_dt = from_epoch(row["return_ts"], server_tz)
 
             if not return_dt:
                 continue
@@ -5327,11 +5489,11 @@ class CMI(commands.Cog):
                 tz_label = row["timezone_label"] or "No timezone specified"
 
                 leave_local = leave_dt.astimezone(server_tz)
-                leave_str = leave_local.strftime("%d/%m/%Y %H:%M")
+                leave_str = fmt_dmyhm(leave_local)
                 leave_ts = to_discord_timestamp(leave_dt)
 
                 return_local = return_dt.astimezone(server_tz)
-                return_str = return_local.strftime("%d/%m/%Y %H:%M")
+                return_str = fmt_dmyhm(return_local)
                 return_ts = to_discord_timestamp(return_dt)
 
                 reason = f" | Reason: {row['reason']}" if row["reason"] else ""
@@ -5396,41 +5558,25 @@ class CMI(commands.Cog):
         guild_id = interaction.guild.id
         user_id = interaction.user.id
 
-        server_tz_name = get_server_timezone_text(guild_id)
-        server_tz_iana = normalize_timezone_input(server_tz_name) or DEFAULT_SERVER_TZ
-        server_tz = ZoneInfo(server_tz_iana)
+        server_tz_name = await get_server_timezone_text(guild_id)
+        server_tz_iana, server_tz = server_zone(server_tz_name)
         now = datetime.now(server_tz)
 
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute(
+        rows = await db_fetchall(
             """
-            SELECT id, leave_dt, return_dt, reason, timezone_label
+            SELECT id, leave_ts, return_ts, reason, timezone_label
             FROM cmi_entries
             WHERE guild_id = ? AND user_id = ?
-            ORDER BY leave_dt DESC
+            ORDER BY leave_ts DESC
             """,
             (guild_id, user_id),
         )
-        rows = cur.fetchall()
-        conn.close()
 
         past = []
 
         for row in rows:
-            try:
-                leave_dt = datetime.fromisoformat(row["leave_dt"])
-            except Exception:
-                continue
-
-            try:
-                return_dt = (
-                    datetime.fromisoformat(row["return_dt"])
-                    if row["return_dt"]
-                    else None
-                )
-            except Exception:
-                return_dt = None
+            leave_dt = from_epoch(row["leave_ts"], server_tz)
+            return_dt = from_epoch(row["return_ts"], server_tz)
 
             if return_dt:
                 return_local = return_dt.astimezone(server_tz)
@@ -5450,11 +5596,11 @@ class CMI(commands.Cog):
             tz_label = row["timezone_label"] or "No timezone specified"
 
             leave_local = leave_dt.astimezone(server_tz)
-            leave_str = leave_local.strftime("%d/%m/%Y %H:%M")
+            leave_str = fmt_dmyhm(leave_local)
             leave_ts = to_discord_timestamp(leave_dt)
 
             return_local = return_dt.astimezone(server_tz)
-            return_str = return_local.strftime("%d/%m/%Y %H:%M")
+            return_str = fmt_dmyhm(return_local)
             return_ts = to_discord_timestamp(return_dt)
 
             reason = f" | Reason: {row['reason']}" if row["reason"] else ""
@@ -5705,12 +5851,11 @@ class CMI(commands.Cog):
             return None
 
         raw = query.strip()
-        raw_lower = raw.lower()
 
         # ----------------------------------------------------
         # ID or mention
         # ----------------------------------------------------
-        mention_match = re.match(r"<@!?(\d+)>", raw)
+        mention_match = _MENTION_RE.match(raw)
 
         if raw.isdigit():
             member = guild.get_member(int(raw))
@@ -5724,36 +5869,36 @@ class CMI(commands.Cog):
                 return member
 
         # ----------------------------------------------------
-        # Build searchable list
+        # Searchable names (folded once per guild, not per search)
         # ----------------------------------------------------
-        members = [m for m in guild.members if not m.bot]
-
-        def all_names(m: discord.Member):
-            return {
-                m.name.lower(),
-                (m.display_name or "").lower(),
-                (m.global_name or "").lower(),
-            }
+        ids, name_sets, fuzzy_names = _guild_search_index(guild)
+        raw_folded = _fold_name(raw)
 
         # ----------------------------------------------------
         # Exact match
         # ----------------------------------------------------
-        exact_matches = [m for m in members if raw_lower in all_names(m)]
+        exact_ids = [mid for mid, names in zip(ids, name_sets) if raw_folded in names]
 
-        if len(exact_matches) == 1:
-            return exact_matches[0]
+        if len(exact_ids) == 1:
+            member = guild.get_member(exact_ids[0])
+            if member:
+                return member
 
         # ----------------------------------------------------
         # Partial match (dropdown for 1–25 results to make selection explicit)
         # ----------------------------------------------------
-        partial_matches = [
-            m for m in members
-            if raw_lower in m.name.lower()
-            or raw_lower in (m.display_name or "").lower()
-            or raw_lower in (m.global_name or "").lower()
+        partial_ids = [
+            mid for mid, names in zip(ids, name_sets)
+            if any(raw_folded in name for name in names)
         ]
+        # Only materialize Member objects when the list is small enough to show
+        partial_matches = (
+            [m for m in map(guild.get_member, partial_ids) if m]
+            if len(partial_ids) <= SELECT_OPTION_LIMIT
+            else []
+        )
 
-        if 1 <= len(partial_matches) <= 25:
+        if partial_matches:
 
             # Build dropdown (even for a single result so the user sees who was matched)
             options = []
@@ -5810,13 +5955,20 @@ class CMI(commands.Cog):
         # ----------------------------------------------------
         # Fuzzy match fallback
         # ----------------------------------------------------
-        name_map = {m.id: (m.display_name or m.name) for m in members}
-        close = get_close_matches(raw, name_map.values(), n=1, cutoff=0.6)
+        # Names were preprocessed when the index was built. The hit is returned
+        # without a dropdown, so use plain ratio (difflib's measure, cutoff 0.6):
+        # WRatio's partial scoring matches one-letter queries to arbitrary members.
+        close = process.extractOne(
+            fuzz_utils.default_process(raw_folded),
+            fuzzy_names,
+            scorer=fuzz.ratio,
+            processor=None,
+            score_cutoff=60,
+        )
 
         if close:
-            for mid, nm in name_map.items():
-                if nm == close[0]:
-                    return guild.get_member(mid)
+            # List choices return (name, score, index)
+            return guild.get_member(ids[close[2]])
 
         # ----------------------------------------------------
         # No matches
@@ -5827,69 +5979,6 @@ class CMI(commands.Cog):
         )
         return None
 
-    # --------------------------------------------------------
-    # Slash Command: /cmi and interaction routing
-    # --------------------------------------------------------
-
-    @app_commands.command(name="cmi", description="Open the CMI menu.")
-    @app_commands.checks.cooldown(5, 30, key=lambda i: i.user.id)
-    async def cmi_command(self, interaction: discord.Interaction):
-        if not interaction.guild:
-            return await interaction.response.send_message(
-                "❌ This command can only be used in a server.",
-                ephemeral=True,
-            )
-
-        await interaction.response.defer(ephemeral=True)
-
-        # Enforce channel restriction
-        if not await enforce_cmi_channel(interaction):
-            return
-
-        is_lead = await is_leadership(interaction)
-        
-        # Reset cooldown for leadership users
-        if is_lead:
-            self.cmi_command.reset_cooldown(interaction)
-
-        embed = build_main_menu_embed(
-            guild=interaction.guild,
-            user=interaction.user,
-            is_leadership=is_lead,
-        )
-
-        view = MainCMIMenuView(
-            guild_id=interaction.guild.id,
-            user_id=interaction.user.id,
-            is_leadership=is_lead,
-        )
-
-        await interaction.followup.send(embed=embed, view=view, ephemeral=True)
-
-    @commands.Cog.listener()
-    async def on_interaction(self, interaction: discord.Interaction):
-        """
-        Routes custom_id-based interactions that aren't handled
-        by built-in UI callbacks.
-        """
-        if not interaction.type == discord.InteractionType.component:
-            return
-
-        cid = interaction.data.get("custom_id")
-        if not cid:
-            return
-
-        # Set Nickname Prefix
-        if cid == "cmi_set_nick_prefix":
-            if not await is_leadership(interaction):
-                return await interaction.response.send_message(
-                    "❌ Only leadership can change the nickname prefix.",
-                    ephemeral=True,
-                )
-
-            modal = SetNicknamePrefixModal()
-            return await interaction.response.send_modal(modal)
-
 
 # ============================================================
 # Section 11B — Slash Command `/cmi`, Interaction Routing, Cog Setup
@@ -5988,89 +6077,93 @@ async def on_app_command_error(interaction: discord.Interaction, error: app_comm
 # Section 11D — Health Check HTTP Server
 # ============================================================
 
-class HealthCheckHandler(BaseHTTPRequestHandler):
-    """Simple HTTP handler for health checks (UptimeRobot monitoring)"""
-    
-    def do_GET(self):
-        if self.path == '/health':
-            # Check if bot is connected
-            if bot.is_ready():
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                response = {
-                    "status": "ok",
-                    "bot_connected": True,
-                    "bot_user": str(bot.user) if bot.user else "Unknown"
-                }
-                self.wfile.write(str(response).encode())
-            else:
-                self.send_response(503)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-                response = {"status": "error", "bot_connected": False}
-                self.wfile.write(str(response).encode())
-        else:
-            self.send_response(404)
-            self.end_headers()
-    
-    def do_HEAD(self):
-        """Handle HEAD requests (used by UptimeRobot for lightweight checks)"""
-        if self.path == '/health':
-            if bot.is_ready():
-                self.send_response(200)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-            else:
-                self.send_response(503)
-                self.send_header('Content-type', 'application/json')
-                self.end_headers()
-        else:
-            self.send_response(404)
-            self.end_headers()
-    
-    def log_message(self, format, *args):
-        # Suppress default HTTP logging to avoid cluttering logs
-        pass
+# Port for the /health endpoint (UptimeRobot monitoring)
+HEALTH_PORT = int(os.environ.get("PORT", "8080"))
 
+_health_runner: web.AppRunner | None = None
 
-def start_health_check_server():
-    """Start health check HTTP server on port 8080"""
+
+async def health_handler(request: web.Request) -> web.Response:
+    """Health check for UptimeRobot monitoring (aiohttp also answers HEAD)."""
+    if bot.is_ready():
+        latency = bot.latency
+        return web.json_response({
+            "status": "ok",
+            "bot_connected": True,
+            "bot_user": str(bot.user) if bot.user else "Unknown",
+            "latency_ms": round(latency * 1000) if math.isfinite(latency) else None,
+            "loop_lag_ms": round(last_loop_lag * 1000),
+        })
+    return web.json_response({"status": "error", "bot_connected": False}, status=503)
+
+
+async def start_health_check_server():
+    """Serve /health from the bot's own event loop."""
+    global _health_runner
+    if _health_runner is not None:
+        return
     try:
-        server = HTTPServer(('0.0.0.0', 8080), HealthCheckHandler)
-        thread = Thread(target=server.serve_forever, daemon=True)
-        thread.start()
-        logging.info("Health check server started on port 8080")
+        app = web.Application()
+        app.router.add_get("/health", health_handler)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, "0.0.0.0", HEALTH_PORT).start()
+        _health_runner = runner
+        logging.info(f"Health check server started on port {HEALTH_PORT}")
     except Exception as e:
         logging.error(f"Failed to start health check server: {e}")
 
 
+async def stop_health_check_server():
+    """Shut down the health check endpoint, if running."""
+    global _health_runner
+    if _health_runner is not None:
+        runner, _health_runner = _health_runner, None
+        await runner.cleanup()
+
+
 # ============================================================
 # Section 11D — Graceful Shutdown Handler
 # ============================================================
 
-def signal_handler(sig, frame):
-    """Handle shutdown signals gracefully"""
-    logging.info(f"Received signal {sig}, shutting down gracefully...")
-    
+_shutdown_task: asyncio.Task | None = None
+
+
+async def shutdown(sig: signal.Signals):
+    """Stop background tasks and close the bot; runs on the event loop."""
+    logging.info(f"Received signal {sig.name}, shutting down gracefully...")
+
     # Stop background tasks
     try:
         away_role_sync_task.cancel()
         cleanup_old_cmi_task.cancel()
+        daily_report_task.cancel()
+        loop_lag_monitor_task.cancel()
         logging.info("Background tasks stopped")
     except Exception as e:
         logging.error(f"Error stopping tasks: {e}")
-    
-    # Close bot connection
-    asyncio.create_task(bot.close())
+
+    # Closing the bot makes bot.start() return; main() then closes the
+    # health server and the database connection.
+    await bot.close()
     logging.info("Bot connection closed")
-    
-    sys.exit(0)
 
 
-# Register signal handlers
-signal.signal(signal.SIGINT, signal_handler)   # Ctrl+C
-signal.signal(signal.SIGTERM, signal_handler)  # systemctl stop
+def _request_shutdown(sig: signal.Signals):
+    global _shutdown_task
+    if _shutdown_task is None:
+        _shutdown_task = asyncio.create_task(shutdown(sig))
+
+
+def install_signal_handlers():
+    """Handle SIGINT (Ctrl+C) and SIGTERM (systemctl stop) on the event loop."""
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, _request_shutdown, sig)
+        except NotImplementedError:
+            # Windows: Ctrl+C still raises KeyboardInterrupt and main() cleans up
+            pass
 
 
 # ============================================================
@@ -6078,24 +6171,50 @@ signal.signal(signal.SIGTERM, signal_handler)  # systemctl stop
 # ============================================================
 
 async def main():
-    # Initialize database
-    init_db()
-    
-    async with bot:
-        # Load the CMI Cog
-        await bot.add_cog(CMI(bot))
+    # Initialize database. Schema setup is the only synchronous sqlite3 work
+    # left, so keep it off the event loop too; runtime queries go through the
+    # aiosqlite connection's own worker thread.
+    await asyncio.to_thread(init_db)
+    await asyncio.to_thread(warm_zone_cache)
+    await open_db()
+    await load_daily_enabled_guilds()
+    install_signal_handlers()
+
+    # Start health check server
+    await start_health_check_server()
 
-        # Start the bot
-        await bot.start(TOKEN)
+    try:
+        async with bot:
+            # Load the CMI Cog
+            await bot.add_cog(CMI(bot))
+
+            # Start the bot
+            await bot.start(TOKEN)
+    finally:
+        await stop_health_check_server()
+        await close_db()
+
+
+_chunk_task: asyncio.Task | None = None
+
+
+async def ensure_guilds_chunked():
+    """Chunk any guild startup chunking missed (e.g. timed out), one at a time."""
+    for guild in bot.guilds:
+        if guild.chunked:
+            continue
+        try:
+            await guild.chunk(cache=True)
+            logging.info(f"Chunked members for guild {guild.id} ({guild.member_count} members)")
+        except Exception as e:
+            logging.warning(f"Failed to chunk guild {guild.id}: {e}")
+        await asyncio.sleep(0.1)
 
 
 @bot.event
 async def on_ready():
     print(f"Logged in as {bot.user} (ID: {bot.user.id})")
 
-    # Start health check server
-    start_health_check_server()
-
     # Sync slash commands
     try:
         synced = await bot.tree.sync()
@@ -6124,6 +6243,18 @@ async def on_ready():
     except RuntimeError:
         pass
 
+    # Start event loop lag telemetry
+    try:
+        loop_lag_monitor_task.start()
+        print("Event loop lag monitor started.")
+    except RuntimeError:
+        pass
+
+    # Member searches read the cache; fill in any guild that isn't fully chunked
+    global _chunk_task
+    if _chunk_task is None or _chunk_task.done():
+        _chunk_task = asyncio.create_task(ensure_guilds_chunked())
+
 
 # ============================================================
 # Run the Bot